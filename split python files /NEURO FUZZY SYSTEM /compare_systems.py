@@ -1,4 +1,8 @@
-def compare_all_systems(): 
+def compare_all_systems(show=False, model_dir=None):
+    # show=True opens the plot window; by default the figure is only saved, so this also runs headless.
+    # With model_dir the trained models are saved there and reused by later runs instead of retraining.
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import mean_squared_error, r2_score
     print("\n" + "=" * 80)
     print("NEURO-FUZZY SYSTEM FOR CHD DIAGNOSIS")
     print("=" * 80)
@@ -19,7 +23,9 @@ def compare_all_systems():
     
     fuzzy_system = NeuroFuzzyCHD()
     fuzzy_system.initialize_membership_functions()
-    y_pred_fuzzy = fuzzy_system.predict(X_test)
+    # Both fuzzy-based systems start from the same membership functions, so the test rows are fuzzified once
+    M_test = fuzzy_system.fuzzify_input(X_test)
+    y_pred_fuzzy = fuzzy_system.apply_rules(M_test)
     mse_fuzzy = mean_squared_error(y_test, y_pred_fuzzy)
     r2_fuzzy = r2_score(y_test, y_pred_fuzzy)
 
@@ -30,8 +36,16 @@ def compare_all_systems():
     print("SYSTEM 2: Neural Network (Pure Learning)")
     print("-" * 50)
     
-    nn = SimpleNeuralNetwork(input_size=6, hidden_size=12, learning_rate=0.01)
-    nn_losses = nn.train(X_train, y_train, epochs=100, verbose=False)
+    nn_path = model_dir and os.path.join(model_dir, 'neural_network.chdmodel')
+    if nn_path and os.path.exists(nn_path):
+        nn = load_model(nn_path)
+        print(f"Loaded from {nn_path}")
+    else:
+        nn = SimpleNeuralNetwork(input_size=6, hidden_size=12, learning_rate=0.01, seed=42)
+        nn.train(X_train, y_train, epochs=100, verbose=False)
+        if nn_path:
+            save_model(nn, nn_path, check_X=X_test)
+    nn_losses = nn.history['train']
     y_pred_nn = nn.forward(X_test).flatten()
     mse_nn = mean_squared_error(y_test, y_pred_nn)
     r2_nn = r2_score(y_test, y_pred_nn)
@@ -43,10 +57,22 @@ def compare_all_systems():
     print("SYSTEM 3: Neuro-Fuzzy System (Best of Both)")
     print("-" * 50)
     
-    nf_system = NeuroFuzzyCHD()
-    nf_system.initialize_membership_functions()
-    nf_losses = nf_system.train_neuro_fuzzy(X_train, y_train, epochs=50, learning_rate=0.01)
-    y_pred_nf = nf_system.predict(X_test)
+    nf_path = model_dir and os.path.join(model_dir, 'neuro_fuzzy.chdmodel')
+    if nf_path and os.path.exists(nf_path):
+        nf_system = load_model(nf_path)
+        print(f"Loaded from {nf_path}")
+    else:
+        nf_system = NeuroFuzzyCHD()
+        nf_system.initialize_membership_functions()
+        nf_system.train_neuro_fuzzy(X_train, y_train, epochs=50, learning_rate=0.01)
+        if nf_path:
+            save_model(nf_system, nf_path, check_X=X_test)
+    nf_losses = nf_system.loss_history['train']
+    # The shared test memberships only apply while the model still has the expert membership functions
+    if nf_system.membership_params == fuzzy_system.membership_params:
+        y_pred_nf = nf_system.apply_rules(M_test)
+    else:
+        y_pred_nf = nf_system.predict(X_test)
     mse_nf = mean_squared_error(y_test, y_pred_nf)
     r2_nf = r2_score(y_test, y_pred_nf)
     
@@ -93,7 +119,10 @@ def compare_all_systems():
 
     plt.tight_layout()
     plt.savefig('neuro_fuzzy_comparison.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    if show:
+        plt.show()
+    else:
+        plt.close()
     
     print("\n Comparison plot saved as 'neuro_fuzzy_comparison.png'")
     
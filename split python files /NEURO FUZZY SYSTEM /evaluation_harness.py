@@ -0,0 +1,137 @@
+
+import time
+from parallel_utils import fork_map
+
+EVAL_SYSTEMS = ['fuzzy', 'neural', 'neuro_fuzzy']
+EVAL_METRICS = ['mse', 'mae', 'r2']
+
+def kfold_indices(n, k=5, seed=0):
+    # k (train_idx, test_idx) pairs over a seeded shuffle; every row is tested exactly once
+    folds = np.array_split(np.random.default_rng(seed).permutation(n), k)
+    return [(np.concatenate(folds[:i] + folds[i + 1:]), folds[i]) for i in range(k)]
+
+def regression_metrics(y_true, y_pred):
+    error = y_pred - y_true
+    total = np.sum((y_true - y_true.mean()) ** 2)
+    return {'mse': float(np.mean(error ** 2)), 'mae': float(np.mean(np.abs(error))),
+            'r2': float(1 - np.sum(error ** 2) / total) if total > 0 else 0.0}
+
+def evaluate_fold(X, y, train_idx, test_idx, seed=0, nn_epochs=100, nf_epochs=50, nf_batch_size=256):
+    # Trains and scores the three systems on one split. The membership matrices are computed once and shared by
+    # the pure fuzzy system and the neuro-fuzzy model, which start from the same expert membership functions.
+    timings = {}
+    start = time.perf_counter()
+    expert = NeuroFuzzyCHD()
+    expert.initialize_membership_functions()
+    M_train = expert.fuzzify_input(X[train_idx])
+    M_test = expert.fuzzify_input(X[test_idx])
+    y_train, y_test = y[train_idx], y[test_idx]
+    timings['fuzzify'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictions = {'fuzzy': expert.apply_rules(M_test)}
+    timings['fuzzy_predict'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    nn = SimpleNeuralNetwork(input_size=6, hidden_size=12, learning_rate=0.01, seed=seed)
+    nn.train(X[train_idx], y_train, epochs=nn_epochs, verbose=False)
+    timings['neural_train'] = time.perf_counter() - start
+    start = time.perf_counter()
+    predictions['neural'] = nn.forward(X[test_idx]).flatten()
+    timings['neural_predict'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    nf = NeuroFuzzyCHD()
+    nf.initialize_membership_functions()
+    nf.train_neuro_fuzzy(X[train_idx], y_train, epochs=nf_epochs, learning_rate=0.01, batch_size=nf_batch_size,
+                         seed=seed, verbose=False, memberships=M_train)
+    timings['neuro_fuzzy_train'] = time.perf_counter() - start
+    start = time.perf_counter()
+    predictions['neuro_fuzzy'] = nf.apply_rules(M_test)
+    timings['neuro_fuzzy_predict'] = time.perf_counter() - start
+
+    return {'metrics': {name: regression_metrics(y_test, predictions[name]) for name in EVAL_SYSTEMS}, 'timings': timings}
+
+def confidence_interval(values, confidence=0.95):
+    # Mean and t-interval half-width; folds of one seed share training rows, so treat the interval as approximate
+    values = np.asarray(values, dtype=float)
+    if len(values) < 2:
+        return float(values.mean()), 0.0
+    if module_available('scipy'):
+        from scipy import stats
+        critical = stats.t.ppf((1 + confidence) / 2, len(values) - 1)
+    else:
+        critical = 1.96
+    return float(values.mean()), float(critical * values.std(ddof=1) / np.sqrt(len(values)))
+
+def evaluate_systems(X=None, y=None, n_samples=5000, k=5, seeds=(0, 1, 2), n_workers=None, confidence=0.95,
+                     nn_epochs=100, nf_epochs=50, nf_batch_size=256, data_seed=42):
+    # k-fold x multi-seed comparison of the pure fuzzy system, SimpleNeuralNetwork and NeuroFuzzyCHD.
+    # Each (seed, fold) task runs in a forked worker; X and y are inherited by the workers, never pickled.
+    if X is None:
+        data = generate_training_data(n_samples, data_seed)
+        X, y = data[:, :6], data[:, 6]
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    tasks = [(seed, fold, train_idx, test_idx) for seed in seeds
+             for fold, (train_idx, test_idx) in enumerate(kfold_indices(len(X), k, seed))]
+
+    def run(task):
+        seed, fold, train_idx, test_idx = task
+        result = evaluate_fold(X, y, train_idx, test_idx, seed, nn_epochs, nf_epochs, nf_batch_size)
+        return dict(result, seed=seed, fold=fold)
+
+    start = time.perf_counter()
+    runs = fork_map(run, tasks, n_workers)
+    wall = time.perf_counter() - start
+
+    table = {}
+    for name in EVAL_SYSTEMS:
+        table[name] = {}
+        for metric in EVAL_METRICS:
+            mean, half_width = confidence_interval([r['metrics'][name][metric] for r in runs], confidence)
+            table[name][metric] = {'mean': mean, 'ci': half_width}
+    stages = list(runs[0]['timings'])
+    timings = {stage: float(sum(r['timings'][stage] for r in runs)) for stage in stages}
+    timings['wall'] = wall
+    return {'table': table, 'runs': runs, 'timings': timings, 'k': k, 'seeds': list(seeds), 'n_samples': len(X),
+            'confidence': confidence}
+
+def print_evaluation(result):
+    level = int(result['confidence'] * 100)
+    print(f"\n{result['k']}-fold x {len(result['seeds'])} seeds on {result['n_samples']} patients (mean ± {level}% CI)")
+    print(f"{'System':<15}" + "".join(f"{metric.upper():>20}" for metric in EVAL_METRICS))
+    print("-" * (15 + 20 * len(EVAL_METRICS)))
+    for name, row in result['table'].items():
+        print(f"{name:<15}" + "".join(f"{row[m]['mean']:>12.4f} ± {row[m]['ci']:<5.3f}" for m in EVAL_METRICS))
+    print("\nTiming (seconds, summed over tasks)")
+    for stage, seconds in result['timings'].items():
+        print(f"  {stage:<22} {seconds:8.2f}")
+
+def plot_evaluation(result, path='neuro_fuzzy_evaluation.png', show=False):
+    # Bar chart of each metric with its confidence interval. Drawn on a bare Figure, so it needs no display;
+    # show=True opens it through pyplot instead.
+    if show:
+        fig = plt.figure(figsize=(5 * len(EVAL_METRICS), 4))
+    else:
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(5 * len(EVAL_METRICS), 4))
+    colors = ['blue', 'green', 'red']
+    for i, metric in enumerate(EVAL_METRICS):
+        ax = fig.add_subplot(1, len(EVAL_METRICS), i + 1)
+        means = [result['table'][name][metric]['mean'] for name in EVAL_SYSTEMS]
+        errors = [result['table'][name][metric]['ci'] for name in EVAL_SYSTEMS]
+        ax.bar(EVAL_SYSTEMS, means, yerr=errors, color=colors, alpha=0.7, capsize=4)
+        ax.set_title(metric.upper())
+        ax.grid(True, axis='y', alpha=0.3)
+    fig.tight_layout()
+    if path:
+        fig.savefig(path, dpi=150, bbox_inches='tight')
+    if show:
+        plt.show()
+    return fig
+
+if __name__ == "__main__":
+    evaluation = evaluate_systems()
+    print_evaluation(evaluation)
+    plot_evaluation(evaluation)
@@ -1,8 +1,15 @@
 
+INPUT_ORDER = ['bp', 'chol', 'hr', 'age', 'smoking', 'diabetes']
+
 class NeuroFuzzyCHD:
     def __init__(self):
         self.membership_params = {}
         self.rule_weights = {}
+        self.rule_table = list(CHD_RULE_TABLE)
+        self.rules = None
+        self.rule_index = None  # support-interval index, see enable_rule_index
+        self.rule_index_key = None  # membership_params_key() the index was built from
+        self.rules_evaluated = self.rules_possible = 0
         self.trained = False
         
     def initialize_membership_functions(self):
@@ -18,102 +25,216 @@ class NeuroFuzzyCHD:
 
         self.membership_params['diabetes'] = {'No': [60, 80, 100],'Pre': [90, 110, 130],'Yes': [115, 200, 350]}
         
-        for i in range(15):
+        for i in range(len(self.rule_table)):
             self.rule_weights[i] = 1.0
+        self.compile_rules()
+        if self.rule_index is not None:
+            self.enable_rule_index()
 
     def triangular_mf(self, x, a, b, c):
         return np.maximum(0, np.minimum((x - a) / (b - a), (c - x) / (c - b)))
 
+    def membership_arrays(self):
+        # One entry per membership column: the input column it reads and its triangle vertices
+        columns, vertices = [], []
+        for col, var in enumerate(INPUT_ORDER):
+            for params in self.membership_params[var].values():
+                columns.append(col)
+                vertices.append(params)
+        vertices = np.array(vertices, dtype=float)
+        return np.array(columns), vertices[:, 0], vertices[:, 1], vertices[:, 2]
+
+    def rule_weight_array(self):
+        return np.array([self.rule_weights[i] for i in range(len(self.rule_table))], dtype=float)
+
     def fuzzify_input(self, X):
-        bp, chol, hr, age, smoking, diabetes = X 
-        memberships = []
-        # BP memberships
-        memberships.append(self.triangular_mf(bp, *self.membership_params['bp']['Low']))
-        memberships.append(self.triangular_mf(bp, *self.membership_params['bp']['Medium']))
-        memberships.append(self.triangular_mf(bp, *self.membership_params['bp']['High']))
-        # Chol memberships
-        memberships.append(self.triangular_mf(chol, *self.membership_params['chol']['Low']))
-        memberships.append(self.triangular_mf(chol, *self.membership_params['chol']['High']))
-        # HR memberships
-        memberships.append(self.triangular_mf(hr, *self.membership_params['hr']['Slow']))
-        memberships.append(self.triangular_mf(hr, *self.membership_params['hr']['Moderate']))
-        memberships.append(self.triangular_mf(hr, *self.membership_params['hr']['Fast']))
-        # Age memberships
-        memberships.append(self.triangular_mf(age, *self.membership_params['age']['Young']))
-        memberships.append(self.triangular_mf(age, *self.membership_params['age']['Middle']))
-        memberships.append(self.triangular_mf(age, *self.membership_params['age']['Old']))
-        # Smoking memberships
-        memberships.append(self.triangular_mf(smoking, *self.membership_params['smoking']['None']))
-        memberships.append(self.triangular_mf(smoking, *self.membership_params['smoking']['Light']))
-        memberships.append(self.triangular_mf(smoking, *self.membership_params['smoking']['Heavy']))
-        # Diabetes memberships
-        memberships.append(self.triangular_mf(diabetes, *self.membership_params['diabetes']['No']))
-        memberships.append(self.triangular_mf(diabetes, *self.membership_params['diabetes']['Pre']))
-        memberships.append(self.triangular_mf(diabetes, *self.membership_params['diabetes']['Yes']))
-        return np.array(memberships)
+        # (6,) -> (17,) or (N, 6) -> (N, 17); columns: BP L/M/H, Chol L/H, HR S/M/F, Age Y/M/O, Smoking N/L/H, Diabetes N/P/Y
+        X = np.asarray(X, dtype=float)
+        columns, a, b, c = self.membership_arrays()
+        return self.triangular_mf(X[..., columns], a, b, c)
     
-    def apply_rules(self, memberships): 
-        r1 = min(memberships[0], memberships[3], memberships[5]) * self.rule_weights[0]         # Rule 1: Low BP & Low Chol & Slow HR 
-        r2 = min(memberships[0], memberships[3], memberships[6]) * self.rule_weights[1]         # Rule 2: Low BP & Low Chol & Moderate HR 
-        r3 = min(memberships[1], memberships[3], memberships[6]) * self.rule_weights[2]         # Rule 3: Medium BP & Low Chol & Moderate HR 
-        r4 = min(memberships[1], memberships[4], memberships[5]) * self.rule_weights[3]         # Rule 4: Medium BP & High Chol & Slow HR 
-        r5 = min(memberships[2], memberships[3], memberships[6]) * self.rule_weights[4]         # Rule 5: High BP & Low Chol & Moderate HR 
-        r6 = min(memberships[2], memberships[4], memberships[7]) * self.rule_weights[5]         # Rule 6: High BP & High Chol & Fast HR 
-        r7 = memberships[10] * self.rule_weights[6]                                             # Rule 7: Old Age 
-        r8 = memberships[13] * self.rule_weights[7]                                             # Rule 8: Heavy Smoking 
-        r9 = memberships[16] * self.rule_weights[8]                                             # Rule 9: Diabetic 
-        r10 = min(memberships[9], memberships[12]) * self.rule_weights[9]                       # Rule 10: Middle Age & Light Smoking 
-        r11 = min(memberships[10], memberships[15]) * self.rule_weights[10]                     # Rule 11: Old Age & Pre-diabetic
-        r12 = min(memberships[12], memberships[15]) * self.rule_weights[11]                     # Rule 12: Light Smoking & Pre-diabetic 
-        r13 = min(memberships[10], memberships[13]) * self.rule_weights[12]                     # Rule 13: Old Age & Heavy Smoking
-        r14 = min(memberships[10], memberships[16]) * self.rule_weights[13]                     # Rule 14: Old Age & Diabetic
-        r15 = min(memberships[13], memberships[16]) * self.rule_weights[14]                     # Rule 15: Heavy Smoking & Diabetic 
+    def compile_rules(self):
+        # Rules come from the shared table; membership columns follow the membership_params order
+        variables = {var: list(self.membership_params[var]) for var in INPUT_ORDER}
+        self.rules = compile_rule_table(self.rule_table, variables)
+
+    def membership_params_key(self):
+        return tuple((var, term, tuple(params)) for var in INPUT_ORDER for term, params in self.membership_params[var].items())
+
+    def enable_rule_index(self):
+        # Triangles are zero outside (a, c)
+        supports = {(var, term): (params[0], params[2]) for var in INPUT_ORDER for term, params in self.membership_params[var].items()}
+        self.rule_index = compile_support_index(self.rules, supports)
+        self.rule_index_key = self.membership_params_key()
+        return self.rule_index
+
+    def current_rule_index(self):
+        # The index, rebuilt first if membership_params changed since it was built (including direct edits)
+        if self.rule_index_key != self.membership_params_key():
+            return self.enable_rule_index()
+        return self.rule_index
+
+    def disable_rule_index(self):
+        self.rule_index = None
+
+    def rule_index_fraction(self):
+        # Average fraction of rules evaluated per patient by predict with the index on
+        return self.rules_evaluated / self.rules_possible if self.rules_possible else 1.0
+
+    def apply_rules(self, memberships, X=None):
+        # X (raw inputs) lets the rule index skip rules that cannot fire
+        if self.rule_index is not None and X is not None and np.ndim(memberships) == 2:
+            strengths, evaluated = fire_rules_indexed(self.rules, self.current_rule_index(), X, memberships)
+            self.rules_evaluated += evaluated
+            self.rules_possible += strengths.size
+        else:
+            strengths = fire_rules(self.rules, memberships)
+        strengths = strengths * self.rule_weight_array()
+        classes = group_by_class(self.rules, strengths)
         
         healthy_center = 0.75
         middle_center = 2.0
         sick_center = 3.25
         
-        healthy_rules = [r1, r2]
-        middle_rules = [r3, r4, r10, r11, r12]
-        sick_rules = [r5, r6, r7, r8, r9, r13, r14, r15]
-        numerator = (sum(healthy_rules) * healthy_center +sum(middle_rules) * middle_center +sum(sick_rules) * sick_center)
-        denominator = (sum(healthy_rules) + sum(middle_rules) + sum(sick_rules))
-
-        if denominator == 0:
-            return 0
-        return numerator / denominator
+        healthy = classes['Healthy'].sum(axis=-1)
+        middle = classes['Middle'].sum(axis=-1)
+        sick = classes['Sick'].sum(axis=-1)
+        numerator = healthy * healthy_center + middle * middle_center + sick * sick_center
+        denominator = healthy + middle + sick
+
+        if np.ndim(denominator) == 0:
+            return 0 if denominator == 0 else numerator / denominator
+        return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
     
     def predict(self, X):
-        if len(X.shape) == 1:
-            memberships = self.fuzzify_input(X)
-            return self.apply_rules(memberships)
-        else:
-            results = []
-            for i in range(X.shape[0]):
-                memberships = self.fuzzify_input(X[i])
-                results.append(self.apply_rules(memberships))
-            return np.array(results)
+        # Whole batch at once: (N, 6) -> (N, 17) memberships -> (N, n_rules) strengths -> (N,)
+        return self.apply_rules(self.fuzzify_input(X), X)
+
+    def set_membership_arrays(self, a, b, c):
+        # Write flat vertex arrays (membership_arrays order) back into membership_params
+        i = 0
+        for var in INPUT_ORDER:
+            for term in self.membership_params[var]:
+                self.membership_params[var][term] = [float(a[i]), float(b[i]), float(c[i])]
+                i += 1
+        if self.rule_index is not None:
+            self.enable_rule_index()
+
+    def rule_centers(self):
+        centers = np.array([0.75, 2.0, 3.25])  # Healthy, Middle, Sick
+        return centers[self.rules['consequent']]
 
-    def train_neuro_fuzzy(self, X, y, epochs=50, learning_rate=0.01):
+    def _batch_gradients(self, F, w, centers, target):
+        # Output is the weighted average sum(w*F*c) / sum(w*F); returns loss, dL/dw and dL/dF
+        s = F * w
+        denominator = s.sum(axis=1)
+        fired = denominator > 0
+        safe = np.where(fired, denominator, 1.0)
+        pred = np.where(fired, (s @ centers) / safe, 0.0)
+        error = pred - target
+        dpred = (centers - pred[:, None]) / safe[:, None] * fired[:, None]
+        g = (2.0 / len(target)) * error
+        grad_w = (g[:, None] * F * dpred).sum(axis=0)
+        grad_F = g[:, None] * w * dpred
+        return np.mean(error ** 2), grad_w, grad_F
+
+    def _membership_gradients(self, X, grad_F):
+        # Backpropagate dL/dF through the t-norms and triangles to the (a, b, c) vertices
+        columns, a, b, c = self.membership_arrays()
+        x = X[:, columns]
+        rise = (x - a) / (b - a)
+        fall = (c - x) / (c - b)
+        mu = np.maximum(0, np.minimum(rise, fall))
+        padded = np.concatenate([mu, np.ones((len(x), 1))], axis=1)
+        index = self.rules['index']
+        grad_F = grad_F * self.rules['weights']
+        grad_mu = np.zeros(padded.shape)
+        for tnorm, rule_idx in self.rules['tnorm_groups'].items():
+            gathered = padded[:, index[rule_idx]]
+            width = gathered.shape[2]
+            if tnorm == 'min':
+                # min passes the gradient to the smallest antecedent only
+                dslot = np.argmin(gathered, axis=2)[..., None] == np.arange(width)
+            else:
+                dslot = np.stack([np.prod(np.delete(gathered, k, axis=2), axis=2) for k in range(width)], axis=2)
+            for k in range(width):
+                onehot = np.zeros((len(rule_idx), padded.shape[1]))
+                onehot[np.arange(len(rule_idx)), index[rule_idx, k]] = 1.0
+                grad_mu += (grad_F[:, rule_idx] * dslot[:, :, k]) @ onehot
+        grad_mu = grad_mu[:, :-1]
+        rising = (mu > 0) & (rise <= fall)
+        falling = (mu > 0) & (rise > fall)
+        grad_a = (grad_mu * rising * (x - b) / (b - a) ** 2).sum(axis=0)
+        grad_b = (grad_mu * (falling * (c - x) / (c - b) ** 2 - rising * (x - a) / (b - a) ** 2)).sum(axis=0)
+        grad_c = (grad_mu * falling * (x - b) / (c - b) ** 2).sum(axis=0)
+        return grad_a, grad_b, grad_c
+
+    def train_neuro_fuzzy(self, X, y, epochs=50, learning_rate=0.01, batch_size=256, tune_membership=False,
+                          membership_learning_rate=None, validation_split=0.0, patience=None, seed=None, verbose=True,
+                          memberships=None):
+        # ANFIS-style training: mini-batch gradient descent on the rule weights and, optionally, the triangle vertices.
+        # memberships can pass in fuzzify_input(X) when the caller already has it; unused with tune_membership
+        if verbose:
+            print("\n Training Neuro-Fuzzy System...")
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        rng = np.random.default_rng(seed)
+        order = rng.permutation(X.shape[0])
+        n_val = int(X.shape[0] * validation_split)
+        X_val, y_val = X[order[:n_val]], y[order[:n_val]]
+        X_train, y_train = X[order[n_val:]], y[order[n_val:]]
+        mf_lr = learning_rate if membership_learning_rate is None else membership_learning_rate
+
+        centers = self.rule_centers()
+        w = self.rule_weight_array()
+        # With fixed membership functions the firing strengths never change, so compute them once
+        M = None if tune_membership else (self.fuzzify_input(X) if memberships is None else np.asarray(memberships, dtype=float))
+        F_train = None if M is None else fire_rules(self.rules, M[order[n_val:]])
+        F_val = None if M is None or n_val == 0 else fire_rules(self.rules, M[order[:n_val]])
 
-        print("\n Training Neuro-Fuzzy System...")
         losses = []
+        self.loss_history = {'train': losses, 'val': []}
+        best = (np.inf, w.copy(), self.membership_arrays()[1:])
+        stale = 0
         for epoch in range(epochs):
-            epoch_loss = 0
-            for i in range(X.shape[0]):
-                # Forward 
-                memberships = self.fuzzify_input(X[i])
-                y_pred = self.apply_rules(memberships)
-                # error
-                error = y[i] - y_pred
-                epoch_loss += error ** 2
-                for rule_idx in self.rule_weights:
-                    self.rule_weights[rule_idx] += learning_rate * error * 0.01
-            total = sum(self.rule_weights.values())
-            for rule_idx in self.rule_weights:
-                self.rule_weights[rule_idx] /= total
-            losses.append(epoch_loss / X.shape[0])
-            if (epoch+1) % 10 == 0:
-                print(f"  Epoch {epoch+1}/{epochs}, Loss: {epoch_loss/X.shape[0]:.4f}")
+            epoch_loss = 0.0
+            perm = rng.permutation(X_train.shape[0])
+            for start in range(0, X_train.shape[0], batch_size):
+                idx = perm[start:start + batch_size]
+                F = F_train[idx] if F_train is not None else fire_rules(self.rules, self.fuzzify_input(X_train[idx]))
+                loss, grad_w, grad_F = self._batch_gradients(F, w, centers, y_train[idx])
+                epoch_loss += loss * len(idx)
+                if tune_membership:
+                    grad_a, grad_b, grad_c = self._membership_gradients(X_train[idx], grad_F)
+                    _, a, b, c = self.membership_arrays()
+                    vertices = np.sort(np.stack([a - mf_lr * grad_a, b - mf_lr * grad_b, c - mf_lr * grad_c]), axis=0)
+                    # keep a < b < c so the triangle slopes stay finite
+                    vertices[1] = np.maximum(vertices[1], vertices[0] + 1e-6)
+                    vertices[2] = np.maximum(vertices[2], vertices[1] + 1e-6)
+                    self.set_membership_arrays(*vertices)
+                w = np.maximum(w - learning_rate * grad_w, 0.0)
+            self.rule_weights = {i: float(w[i]) for i in range(len(w))}
+            losses.append(epoch_loss / X_train.shape[0])
+
+            monitored = losses[-1]
+            if n_val:
+                F = F_val if F_val is not None else fire_rules(self.rules, self.fuzzify_input(X_val))
+                monitored = self._batch_gradients(F, w, centers, y_val)[0]
+                self.loss_history['val'].append(monitored)
+            if verbose and (epoch+1) % 10 == 0:
+                print(f"  Epoch {epoch+1}/{epochs}, Loss: {losses[-1]:.4f}")
+            if monitored < best[0]:
+                best = (monitored, w.copy(), self.membership_arrays()[1:])
+                stale = 0
+            elif patience is not None:
+                stale += 1
+                if stale >= patience:
+                    if verbose:
+                        print(f"  Early stopping at epoch {epoch+1}")
+                    break
+        if patience is not None:
+            # restore the best epoch
+            self.rule_weights = {i: float(v) for i, v in enumerate(best[1])}
+            self.set_membership_arrays(*best[2])
         self.trained = True
         return losses
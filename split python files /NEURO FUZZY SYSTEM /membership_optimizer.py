@@ -0,0 +1,115 @@
+
+import time
+from parallel_utils import fork_map
+
+MF_MIN_GAP = 1e-6  # smallest b - a and c - b, so no triangle slope divides by zero
+
+def repair_vertices(vertices):
+    # (P, 3, n_columns) candidates -> a <= b <= c per membership function, with MF_MIN_GAP between the vertices
+    vertices = np.sort(vertices, axis=1)
+    vertices[:, 1] = np.maximum(vertices[:, 1], vertices[:, 0] + MF_MIN_GAP)
+    vertices[:, 2] = np.maximum(vertices[:, 2], vertices[:, 1] + MF_MIN_GAP)
+    return vertices
+
+def membership_bounds(model, X, margin=0.1):
+    # Search box per membership column: the span of the input's data and of its current vertices, widened by margin
+    columns, a, b, c = model.membership_arrays()
+    data_lo, data_hi = np.nanmin(X, axis=0)[columns], np.nanmax(X, axis=0)[columns]
+    lo, hi = np.zeros(len(columns)), np.zeros(len(columns))
+    for col in np.unique(columns):
+        own = columns == col
+        lo[own] = min(data_lo[own][0], a[own].min())
+        hi[own] = max(data_hi[own][0], c[own].max())
+    width = hi - lo
+    return lo - margin * width, hi + margin * width
+
+def membership_population_loss(model, X, y, vertices, block_size=8192):
+    # (P, 3, n_columns) candidate triangles -> (P,) MSE of the model's rules and weights with each candidate.
+    # Patients go through block_size at a time as a (P, block, n_columns) membership tensor; the block does not
+    # depend on P, so a candidate's loss is the same however the population is split over workers.
+    columns = model.membership_arrays()[0]
+    a, b, c = (vertices[:, k, None, :] for k in range(3))
+    weights = model.rule_weight_array()
+    centers = model.rule_centers()
+    P = len(vertices)
+    sse = np.zeros(P)
+    for start in range(0, len(X), block_size):
+        x = X[start:start + block_size][:, columns]
+        n = len(x)
+        mu = model.triangular_mf(x[None], a, b, c)
+        strengths = fire_rules(model.rules, mu.reshape(P * n, -1)) * weights
+        denominator = strengths.sum(axis=1)
+        numerator = (strengths * centers).sum(axis=1)
+        pred = np.divide(numerator, denominator, out=np.zeros(P * n), where=denominator != 0).reshape(P, n)
+        sse += ((pred - y[start:start + block_size]) ** 2).sum(axis=1)
+    return sse / len(X)
+
+def evaluate_population(model, X, y, vertices, n_workers=None):
+    # Candidates are split into one block per worker; forked workers inherit model, X and y
+    n_workers = min(n_workers or os.cpu_count() or 1, len(vertices))
+    blocks = np.array_split(np.arange(len(vertices)), n_workers)
+    losses = fork_map(lambda idx: membership_population_loss(model, X, y, vertices[idx]), blocks, n_workers)
+    return np.concatenate(losses)
+
+def optimize_membership_functions(model, X, y, method='de', population=32, generations=50, sample_size=20000,
+                                  mutation=0.6, crossover=0.9, step=0.1, n_workers=None, seed=0, verbose=True):
+    # Fits all triangle vertices of model to (X, y) with its current rules and weights, and writes the best set back
+    # into membership_params when it beats the starting point on the full cohort.
+    # method 'de': differential evolution (rand/1/bin); each generation scores parents and trials on one fresh
+    # sample of sample_size patients, so both sides of every comparison see the same rows.
+    # method 'random': random search around the best candidate, with step * search width shrinking over the run.
+    if method not in ('de', 'random'):
+        raise ValueError(f"Unknown method {method!r}, expected 'de' or 'random'")
+    # rand/1/bin mutates each member with three other, distinct members
+    min_population = 4 if method == 'de' else 2
+    if population < min_population:
+        raise ValueError(f"population must be at least {min_population} for method {method!r}, got {population}")
+    if generations < 1:
+        raise ValueError(f"generations must be at least 1, got {generations}")
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    rng = np.random.default_rng(seed)
+    start_time = time.perf_counter()
+    _, a0, b0, c0 = model.membership_arrays()
+    start = np.stack([a0, b0, c0])
+    lo, hi = membership_bounds(model, X)
+    width = hi - lo
+
+    # Population: the current vertices plus random jitters of them
+    pop = start + rng.normal(0, 0.1, size=(population,) + start.shape) * width
+    pop[0] = start
+    pop = repair_vertices(np.clip(pop, lo, hi))
+    best, history = start, []
+    for generation in range(generations):
+        rows = rng.choice(len(X), sample_size, replace=False) if sample_size and sample_size < len(X) else slice(None)
+        Xs, ys = X[rows], y[rows]
+        if method == 'de':
+            r = np.array([rng.choice(np.delete(np.arange(population), i), 3, replace=False) for i in range(population)])
+            mutant = pop[r[:, 0]] + mutation * (pop[r[:, 1]] - pop[r[:, 2]])
+            cross = rng.random(pop.shape) < crossover
+            cross.reshape(population, -1)[np.arange(population), rng.integers(pop[0].size, size=population)] = True
+            trials = repair_vertices(np.clip(np.where(cross, mutant, pop), lo, hi))
+            losses = evaluate_population(model, Xs, ys, np.concatenate([pop, trials]), n_workers)
+            improved = losses[population:] <= losses[:population]
+            pop[improved] = trials[improved]
+            fitness = np.where(improved, losses[population:], losses[:population])
+            best = pop[np.argmin(fitness)].copy()
+        else:
+            scale = step * (1 - generation / generations)
+            candidates = repair_vertices(np.clip(best + rng.normal(0, scale, size=(population - 1,) + start.shape) * width, lo, hi))
+            fitness = evaluate_population(model, Xs, ys, np.concatenate([best[None], candidates]), n_workers)
+            best = np.concatenate([best[None], candidates])[np.argmin(fitness)]
+        history.append(float(fitness.min()))
+        if verbose and (generation + 1) % 10 == 0:
+            print(f"  Generation {generation + 1}/{generations}, sample MSE: {history[-1]:.4f}")
+
+    initial_loss, final_loss = membership_population_loss(model, X, y, np.stack([start, best]))
+    if final_loss < initial_loss:
+        model.set_membership_arrays(*best)
+    else:
+        final_loss, best = initial_loss, start
+    elapsed = time.perf_counter() - start_time
+    if verbose:
+        print(f"  MSE {initial_loss:.4f} -> {final_loss:.4f} on {len(X)} patients in {elapsed:.1f}s")
+    return {'initial_loss': float(initial_loss), 'loss': float(final_loss), 'vertices': best, 'history': history,
+            'seconds': elapsed}
@@ -0,0 +1,119 @@
+
+import json
+import os
+import struct
+
+# Model file: magic, format version, header length, JSON header, then every parameter array as raw
+# little-endian bytes at a 64-byte aligned offset. Arrays load with np.memmap, so scoring processes that open
+# the same file share its pages instead of each holding a copy.
+ARTIFACT_MAGIC = b'CHDMODEL'
+ARTIFACT_VERSION = 1
+ARTIFACT_ALIGN = 64
+_PREAMBLE = struct.Struct('<8sII')
+
+def _aligned(offset):
+    return -(-offset // ARTIFACT_ALIGN) * ARTIFACT_ALIGN
+
+def write_artifact(path, kind, arrays, meta=None):
+    # arrays: name -> ndarray; meta: JSON-serializable settings. Written to a temporary file and renamed,
+    # so a reader never sees a half-written model.
+    arrays = {name: np.ascontiguousarray(value, dtype=np.asarray(value).dtype.newbyteorder('<')) for name, value in arrays.items()}
+    entries = {}
+    offset = 0
+    for name, value in arrays.items():
+        entries[name] = {'dtype': value.dtype.str, 'shape': list(value.shape), 'offset': offset}
+        offset = _aligned(offset + value.nbytes)
+    header = json.dumps({'kind': kind, 'arrays': entries, 'meta': meta or {}}).encode()
+    data_start = _aligned(_PREAMBLE.size + len(header))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, 'wb') as f:
+        f.write(_PREAMBLE.pack(ARTIFACT_MAGIC, ARTIFACT_VERSION, len(header)))
+        f.write(header)
+        for name, value in arrays.items():
+            f.seek(data_start + entries[name]['offset'])
+            f.write(value.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp, path)
+
+def read_artifact(path, mmap_mode='c'):
+    # -> (kind, arrays, meta). mmap_mode 'c' maps the arrays copy-on-write, 'r' read-only (inference only: in-place
+    # updates fail), None reads them into memory
+    with open(path, 'rb') as f:
+        magic, version, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != ARTIFACT_MAGIC:
+            raise ValueError(f"{path} is not a CHD model artifact")
+        if version > ARTIFACT_VERSION:
+            raise ValueError(f"{path} has format version {version}, this code reads up to {ARTIFACT_VERSION}")
+        header = json.loads(f.read(header_len))
+    data_start = _aligned(_PREAMBLE.size + header_len)
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype, shape = np.dtype(entry['dtype']), tuple(entry['shape'])
+        if mmap_mode is None or 0 in shape:
+            arrays[name] = np.fromfile(path, dtype=dtype, count=int(np.prod(shape)), offset=data_start + entry['offset']).reshape(shape)
+        else:
+            arrays[name] = np.memmap(path, dtype=dtype, mode=mmap_mode, offset=data_start + entry['offset'], shape=shape)
+    return header['kind'], arrays, header['meta']
+
+def save_model(model, path, check_X=None):
+    # NeuroFuzzyCHD or SimpleNeuralNetwork -> artifact file. With check_X the file is reloaded and must
+    # reproduce model's predictions on those rows exactly.
+    if isinstance(model, NeuroFuzzyCHD):
+        columns, a, b, c = model.membership_arrays()
+        arrays = {'mf_vertices': np.stack([a, b, c], axis=1), 'rule_weights': model.rule_weight_array()}
+        meta = {'terms': {var: list(model.membership_params[var]) for var in INPUT_ORDER}, 'rule_table': model.rule_table,
+                'rule_index': model.rule_index is not None, 'trained': model.trained,
+                'history': getattr(model, 'loss_history', None)}
+    elif isinstance(model, SimpleNeuralNetwork):
+        arrays = {'W1': model.W1, 'b1': model.b1, 'W2': model.W2, 'b2': model.b2}
+        if model.x_mean is not None:
+            arrays.update(x_mean=model.x_mean, x_std=model.x_std)
+        meta = {'learning_rate': model.lr, 'history': getattr(model, 'history', None)}
+    else:
+        raise TypeError(f"Cannot save {type(model).__name__}")
+    write_artifact(path, type(model).__name__, arrays, meta)
+    if check_X is not None:
+        check_model_roundtrip(model, path, check_X)
+    return path
+
+def load_model(path, mmap_mode='c'):
+    # The default copy-on-write mapping shares pages until the model is trained further. Pass 'r' for processes
+    # that only score: train() would fail on the read-only weights. NeuroFuzzyCHD copies its parameters into
+    # Python floats, so for it the mode makes no difference.
+    kind, arrays, meta = read_artifact(path, mmap_mode)
+    if kind == 'NeuroFuzzyCHD':
+        model = NeuroFuzzyCHD()
+        model.rule_table = [dict(rule, **{'if': [tuple(a) for a in rule['if']]}) for rule in meta['rule_table']]
+        model.membership_params = {var: {term: None for term in meta['terms'][var]} for var in INPUT_ORDER}
+        model.set_membership_arrays(*arrays['mf_vertices'].T)
+        model.rule_weights = {i: float(w) for i, w in enumerate(arrays['rule_weights'])}
+        model.compile_rules()
+        if meta['rule_index']:
+            model.enable_rule_index()
+        model.trained = meta['trained']
+        if meta['history'] is not None:
+            model.loss_history = meta['history']
+        return model
+    if kind == 'SimpleNeuralNetwork':
+        model = SimpleNeuralNetwork(input_size=arrays['W1'].shape[0], hidden_size=arrays['W1'].shape[1], learning_rate=meta['learning_rate'])
+        model.W1, model.b1, model.W2, model.b2 = arrays['W1'], arrays['b1'], arrays['W2'], arrays['b2']
+        model.x_mean, model.x_std = arrays.get('x_mean'), arrays.get('x_std')
+        if meta['history'] is not None:
+            model.history = meta['history']
+        return model
+    raise ValueError(f"Unknown model kind {kind!r} in {path}")
+
+def model_predict(model, X):
+    if isinstance(model, SimpleNeuralNetwork):
+        return model.forward(X).flatten()
+    return model.predict(X)
+
+def check_model_roundtrip(model, path, X, mmap_mode='r'):
+    # Reload path and require bit-identical predictions on X
+    X = np.asarray(X, dtype=float)
+    expected = model_predict(model, X)
+    actual = model_predict(load_model(path, mmap_mode), X)
+    if not np.array_equal(expected, actual):
+        raise ValueError(f"{path}: reloaded model differs, max abs difference {np.max(np.abs(expected - actual)):.3g}")
+    return True
@@ -1,27 +1,39 @@
 
 class SimpleNeuralNetwork:
 
-    def __init__(self, input_size=6, hidden_size=10, learning_rate=0.01):
+    def __init__(self, input_size=6, hidden_size=10, learning_rate=0.01, seed=None):
         self.lr = learning_rate
-        self.W1 = np.random.randn(input_size, hidden_size) * 0.1
+        # seed=None keeps drawing from the global RNG
+        normal = np.random.standard_normal if seed is None else np.random.default_rng(seed).standard_normal
+        self.W1 = normal((input_size, hidden_size)) * 0.1
         self.b1 = np.zeros((1, hidden_size))
-        self.W2 = np.random.randn(hidden_size, 1) * 0.1
+        self.W2 = normal((hidden_size, 1)) * 0.1
         self.b2 = np.zeros((1, 1))
-        
+        # Input standardization fitted by train_minibatch; forward applies it when set
+        self.x_mean = None
+        self.x_std = None
+
     def sigmoid(self, x):
         return 1 / (1 + np.exp(-np.clip(x, -500, 500)))
-    
+
     def sigmoid_derivative(self, x):
         return x * (1 - x)
-    
+
+    def standardize(self, X):
+        if self.x_mean is None:
+            return X
+        return (X - self.x_mean) / self.x_std
+
     def forward(self, X):
+        X = self.standardize(X)
         self.z1 = np.dot(X, self.W1) + self.b1
         self.a1 = self.sigmoid(self.z1)
         self.z2 = np.dot(self.a1, self.W2) + self.b2
-        self.a2 = self.z2  
+        self.a2 = self.z2
         return self.a2
-    
+
     def backward(self, X, y, output):
+        X = self.standardize(X)
         m = X.shape[0]
         dZ2 = output - y.reshape(-1, 1)
         dW2 = (1/m) * np.dot(self.a1.T, dZ2)
@@ -34,7 +46,7 @@ class SimpleNeuralNetwork:
         self.b2 -= self.lr * db2
         self.W1 -= self.lr * dW1
         self.b1 -= self.lr * db1
-    
+
     def train(self, X, y, epochs=100, verbose=True):
         losses = []
         for epoch in range(epochs):
@@ -44,4 +56,145 @@ class SimpleNeuralNetwork:
             losses.append(loss)
             if verbose and (epoch+1) % 20 == 0:
                 print(f"  Epoch {epoch+1}/{epochs}, Loss: {loss:.4f}")
+        self.history = {'train': losses, 'val': []}
+        return losses
+
+    def train_minibatch(self, X, y, epochs=100, batch_size=256, optimizer='adam', learning_rate=None, momentum=0.9,
+                        beta1=0.9, beta2=0.999, eps=1e-8, dtype=np.float32, standardize=True,
+                        validation_split=0.1, patience=10, seed=None, verbose=True):
+        # Shuffled mini-batches over preallocated buffers; X may be a memory-mapped array, rows are gathered per batch
+        if optimizer not in ('sgd', 'momentum', 'adam'):
+            raise ValueError(f"Unknown optimizer {optimizer!r}")
+        if learning_rate is None:
+            learning_rate = 0.001 if optimizer == 'adam' else self.lr
+        rng = np.random.default_rng(seed)
+        n = X.shape[0]
+        order = rng.permutation(n)
+        n_val = int(n * validation_split)
+        val_idx, train_idx = order[:n_val], order[n_val:]
+        y = np.asarray(y).reshape(-1)
+
+        if standardize:
+            # Streaming mean/std over the training rows so X is never copied whole
+            total = np.zeros(X.shape[1])
+            total_sq = np.zeros(X.shape[1])
+            for start in range(0, len(train_idx), 1000000):
+                rows = np.asarray(X[np.sort(train_idx[start:start + 1000000])], dtype=np.float64)
+                total += rows.sum(axis=0)
+                total_sq += (rows ** 2).sum(axis=0)
+            mean = total / len(train_idx)
+            self.x_mean = mean.astype(dtype)
+            self.x_std = np.sqrt(np.maximum(total_sq / len(train_idx) - mean ** 2, 1e-12)).astype(dtype)
+        else:
+            self.x_mean = self.x_std = None
+
+        self.W1, self.b1, self.W2, self.b2 = (p.astype(dtype) for p in (self.W1, self.b1, self.W2, self.b2))
+        params = [self.W1, self.b1, self.W2, self.b2]
+        grads = [np.zeros_like(p) for p in params]
+        state1 = [np.zeros_like(p) for p in params]  # momentum velocity / Adam first moment
+        state2 = [np.zeros_like(p) for p in params]  # Adam second moment
+        scratch = [np.zeros_like(p) for p in params]
+        hidden = self.W1.shape[1]
+        Xb = np.empty((batch_size, X.shape[1]), dtype=dtype)
+        yb = np.empty((batch_size, 1), dtype=dtype)
+        a1 = np.empty((batch_size, hidden), dtype=dtype)
+        out = np.empty((batch_size, 1), dtype=dtype)
+        dA1 = np.empty((batch_size, hidden), dtype=dtype)
+        clip = 500 if dtype == np.float64 else 80
+
+        def forward_batch(idx):
+            # Fills the first m rows of the buffers; returns m
+            m = len(idx)
+            Xb[:m] = X[idx]
+            yb[:m, 0] = y[idx]
+            if self.x_mean is not None:
+                Xb[:m] -= self.x_mean
+                Xb[:m] /= self.x_std
+            np.dot(Xb[:m], self.W1, out=a1[:m])
+            a1[:m] += self.b1
+            np.clip(a1[:m], -clip, clip, out=a1[:m])
+            np.negative(a1[:m], out=a1[:m])
+            np.exp(a1[:m], out=a1[:m])
+            a1[:m] += 1
+            np.reciprocal(a1[:m], out=a1[:m])
+            np.dot(a1[:m], self.W2, out=out[:m])
+            out[:m] += self.b2
+            out[:m] -= yb[:m]  # out now holds the error dZ2
+            return m
+
+        def evaluate(idx):
+            sq = 0.0
+            for start in range(0, len(idx), batch_size):
+                m = forward_batch(np.sort(idx[start:start + batch_size]))
+                sq += float(np.dot(out[:m, 0], out[:m, 0]))
+            return sq / len(idx)
+
+        losses = []
+        self.history = {'train': losses, 'val': []}
+        best = (np.inf, [p.copy() for p in params])
+        stale = 0
+        step = 0
+        for epoch in range(epochs):
+            epoch_sq = 0.0
+            perm = train_idx[rng.permutation(len(train_idx))]
+            for start in range(0, len(perm), batch_size):
+                m = forward_batch(perm[start:start + batch_size])
+                dZ2 = out[:m]
+                epoch_sq += float(np.dot(dZ2[:, 0], dZ2[:, 0]))
+                # Gradients, same formulas as backward()
+                np.dot(a1[:m].T, dZ2, out=grads[2])
+                grads[2] /= m
+                np.sum(dZ2, axis=0, keepdims=True, out=grads[3])
+                grads[3] /= m
+                np.dot(dZ2, self.W2.T, out=dA1[:m])
+                dA1[:m] *= a1[:m]
+                np.subtract(1, a1[:m], out=a1[:m])
+                dA1[:m] *= a1[:m]
+                np.dot(Xb[:m].T, dA1[:m], out=grads[0])
+                grads[0] /= m
+                np.sum(dA1[:m], axis=0, keepdims=True, out=grads[1])
+                grads[1] /= m
+                step += 1
+                for p, g, s1, s2, tmp in zip(params, grads, state1, state2, scratch):
+                    if optimizer == 'sgd':
+                        np.multiply(g, learning_rate, out=tmp)
+                        p -= tmp
+                    elif optimizer == 'momentum':
+                        s1 *= momentum
+                        np.multiply(g, learning_rate, out=tmp)
+                        s1 -= tmp
+                        p += s1
+                    else:
+                        s1 *= beta1
+                        np.multiply(g, 1 - beta1, out=tmp)
+                        s1 += tmp
+                        s2 *= beta2
+                        np.multiply(g, g, out=tmp)
+                        tmp *= 1 - beta2
+                        s2 += tmp
+                        np.divide(s2, 1 - beta2 ** step, out=tmp)
+                        np.sqrt(tmp, out=tmp)
+                        tmp += eps
+                        np.divide(s1, tmp, out=tmp)
+                        tmp *= learning_rate / (1 - beta1 ** step)
+                        p -= tmp
+            losses.append(epoch_sq / len(train_idx))
+            monitored = losses[-1]
+            if n_val:
+                monitored = evaluate(val_idx)
+                self.history['val'].append(monitored)
+            if verbose and (epoch+1) % 10 == 0:
+                val = f", Val: {monitored:.4f}" if n_val else ""
+                print(f"  Epoch {epoch+1}/{epochs}, Loss: {losses[-1]:.4f}{val}")
+            if monitored < best[0]:
+                best = (monitored, [p.copy() for p in params])
+                stale = 0
+            elif patience is not None:
+                stale += 1
+                if stale >= patience:
+                    if verbose:
+                        print(f"  Early stopping at epoch {epoch+1}")
+                    break
+        for p, saved in zip(params, best[1]):
+            p[...] = saved
         return losses
@@ -1,59 +1,57 @@
 
-def generate_training_data(n_samples=200):
-    np.random.seed(42)  
-    data = []
-    for _ in range(n_samples):
-        bp = np.random.uniform(90, 210)
-        chol = np.random.uniform(100, 300)
-        hr = np.random.uniform(50, 150)
-        age = np.random.uniform(20, 90)
-        smoking = np.random.uniform(0, 2) 
-        diabetes = np.random.uniform(70, 300)  # glucose level      
-        risk = 0
-
-        if bp < 120:
-            risk += 0.5
-        elif bp < 140:
-            risk += 1.5
-        else:
-            risk += 2.5
-
-        if chol < 180:
-            risk += 0.5
-        elif chol < 240:
-            risk += 1.5
-        else:
-            risk += 2.5
-
-        if hr < 60:
-            risk += 0.5
-        elif hr < 100:
-            risk += 1.0
-        else:
-            risk += 2.0
-            
-        if age < 40:
-            risk += 0.3
-        elif age < 60:
-            risk += 1.2
-        else:
-            risk += 2.0
-            
-        if smoking < 0.2:
-            risk += 0.2
-        elif smoking < 1:
-            risk += 1.5
-        else:
-            risk += 2.5
-
-        if diabetes < 100:
-            risk += 0.3
-        elif diabetes < 126:
-            risk += 1.3
-        else:
-            risk += 2.3
-
-        chd = min(4.0, risk / 2.5)
-        data.append([bp, chol, hr, age, smoking, diabetes, chd])
-    
-    return np.array(data)
+# Input ranges (bp, chol, hr, age, smoking, glucose) and the risk points scored below/between/above each pair of thresholds
+FEATURE_LOW = np.array([90, 100, 50, 20, 0, 70], dtype=float)
+FEATURE_HIGH = np.array([210, 300, 150, 90, 2, 300], dtype=float)
+RISK_THRESHOLDS = [[120, 140], [180, 240], [60, 100], [40, 60], [0.2, 1], [100, 126]]
+RISK_POINTS = [[0.5, 1.5, 2.5], [0.5, 1.5, 2.5], [0.5, 1.0, 2.0], [0.3, 1.2, 2.0], [0.2, 1.5, 2.5], [0.3, 1.3, 2.3]]
+
+# Rows are drawn in fixed blocks, each with its own seed, so the data only depends on the seed and never on the chunk size
+GENERATOR_BLOCK_SIZE = 65536
+
+def chd_risk(X):
+    # Threshold binning of each input, summed in column order and scaled to the 0-4 CHD range
+    risk = np.zeros(X.shape[0])
+    for col in range(X.shape[1]):
+        risk += np.asarray(RISK_POINTS[col])[np.digitize(X[:, col], RISK_THRESHOLDS[col])]
+    return np.minimum(4.0, risk / 2.5)
+
+def _generate_block(seed, block):
+    rng = np.random.default_rng([seed, block])
+    X = rng.uniform(FEATURE_LOW, FEATURE_HIGH, size=(GENERATOR_BLOCK_SIZE, len(FEATURE_LOW)))
+    return np.column_stack([X, chd_risk(X)])
+
+def iter_training_chunks(n_samples, chunk_size=1000000, seed=42):
+    # Yields (rows, 7) arrays [bp, chol, hr, age, smoking, diabetes, chd] of chunk_size rows (last one shorter).
+    # Arguments are checked here, before the first chunk is asked for
+    if n_samples < 0:
+        raise ValueError(f"n_samples must be non-negative, got {n_samples}")
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    return _training_chunks(n_samples, chunk_size, seed)
+
+def _training_chunks(n_samples, chunk_size, seed):
+    pending = []
+    pending_rows = 0
+    n_blocks = -(-n_samples // GENERATOR_BLOCK_SIZE)
+    for block in range(n_blocks):
+        rows = min(GENERATOR_BLOCK_SIZE, n_samples - block * GENERATOR_BLOCK_SIZE)
+        pending.append(_generate_block(seed, block)[:rows])
+        pending_rows += rows
+        while pending_rows >= chunk_size or (block == n_blocks - 1 and pending_rows > 0):
+            data = np.concatenate(pending) if len(pending) > 1 else pending[0]
+            yield data[:chunk_size]
+            pending = [data[chunk_size:]]
+            pending_rows = len(pending[0])
+
+def generate_training_data(n_samples=200, seed=42):
+    return np.concatenate(list(iter_training_chunks(n_samples, max(n_samples, 1), seed)) or [np.empty((0, 7))])
+
+def write_training_data_npy(path, n_samples, chunk_size=1000000, seed=42, dtype=np.float64):
+    # Fill a memory-mapped .npy file chunk by chunk; memory use is bounded by chunk_size, not n_samples
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(n_samples, 7))
+    start = 0
+    for chunk in iter_training_chunks(n_samples, chunk_size, seed):
+        out[start:start + len(chunk)] = chunk
+        start += len(chunk)
+    out.flush()
+    return out
@@ -0,0 +1,27 @@
+import time
+import tracemalloc
+
+def benchmark_nn_training(n_samples=1000000, full_batch_epochs=100, minibatch_epochs=5, batch_size=1024, seed=0):
+    # Old full-batch loop vs train_minibatch on the same cohort: wall time, peak traced memory and held-out MSE
+    data = generate_training_data(n_samples + 100000, seed=seed)
+    X, y = data[:n_samples, :6], data[:n_samples, 6]
+    X_test, y_test = data[n_samples:, :6], data[n_samples:, 6]
+    results = {}
+    for name in ('full_batch', 'minibatch'):
+        nn = SimpleNeuralNetwork(input_size=6, hidden_size=12, learning_rate=0.01, seed=seed)
+        tracemalloc.start()
+        start = time.perf_counter()
+        if name == 'full_batch':
+            nn.train(X, y, epochs=full_batch_epochs, verbose=False)
+        else:
+            nn.train_minibatch(X, y, epochs=minibatch_epochs, batch_size=batch_size, validation_split=0.0, seed=seed, verbose=False)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        mse = float(np.mean((nn.forward(X_test).ravel() - y_test) ** 2))
+        results[name] = {'seconds': elapsed, 'peak_mb': peak / 2**20, 'test_mse': mse}
+    print(f"\n{'Trainer':<12} {'Seconds':>9} {'Peak MB':>9} {'Test MSE':>9}   ({n_samples} rows)")
+    for name, r in results.items():
+        print(f"{name:<12} {r['seconds']:>9.2f} {r['peak_mb']:>9.1f} {r['test_mse']:>9.4f}")
+    print(f"Speedup: {results['full_batch']['seconds'] / results['minibatch']['seconds']:.1f}x")
+    return results
@@ -1,21 +1,87 @@
-def apply_advanced_rules(bp_fuzz, chol_fuzz, hr_fuzz, age_fuzz, smoke_fuzz, diabetes_fuzz):
-    # Original 6 rules 
-    rule1 = min(bp_fuzz['Low'], chol_fuzz['Low'], hr_fuzz['Slow'])
-    rule2 = min(bp_fuzz['Low'], chol_fuzz['Low'], hr_fuzz['Moderate'])
-    rule3 = min(bp_fuzz['Medium'], chol_fuzz['Low'], hr_fuzz['Moderate'])
-    rule4 = min(bp_fuzz['Medium'], chol_fuzz['High'], hr_fuzz['Slow'])
-    rule5 = min(bp_fuzz['High'], chol_fuzz['Low'], hr_fuzz['Moderate'])
-    rule6 = min(bp_fuzz['High'], chol_fuzz['High'], hr_fuzz['Fast'])
-    # additional factors)
-    rule7 = age_fuzz['Old'] 
-    rule8 = smoke_fuzz['Heavy'] 
-    rule9 = diabetes_fuzz['Yes']  
-    rule10 = min(age_fuzz['Middle'], smoke_fuzz['Light'])
-    rule11 = min(age_fuzz['Old'], diabetes_fuzz['Pre'])
-    rule12 = min(smoke_fuzz['Light'], diabetes_fuzz['Pre'])
-    rule13 = min(age_fuzz['Old'], smoke_fuzz['Heavy'])
-    rule14 = min(age_fuzz['Old'], diabetes_fuzz['Yes'])
-    rule15 = min(smoke_fuzz['Heavy'], diabetes_fuzz['Yes'])
-
-    rules = {'Healthy': [rule1, rule2],'Middle': [rule3, rule4, rule10, rule11, rule12],'Sick': [rule5, rule6, rule7, rule8, rule9, rule13, rule14, rule15]}
-    return rules
+from fuzzy_rule_engine import (CHD_RULE_TABLE, HEDGES, active_rules, compile_rule_table, compile_support_index, describe_rule, fire_rules,
+                               fire_rules_indexed, fire_rules_scalar, group_by_class, hedge_sweep, rule_weight_grid, sweep_errors,
+                               weight_sweep)
+
+# The 15 advanced rules are data (see fuzzy_rule_engine.CHD_RULE_TABLE); add rules with set_advanced_rule_table
+ADVANCED_RULE_TABLE = list(CHD_RULE_TABLE)
+ADVANCED_RULES = compile_rule_table(ADVANCED_RULE_TABLE, {var: list(terms) for var, terms in MEMBERSHIP_PARAMS.items()})
+
+# Support-interval index: when on, only rules whose terms can all be non-zero for a patient are evaluated
+RULE_INDEX = None
+RULE_INDEX_SOURCE = None  # (membership params, LUT) the index was built from
+RULE_INDEX_COUNTS = {'evaluated': 0, 'possible': 0}
+
+def set_advanced_rule_table(rule_table):
+    global ADVANCED_RULE_TABLE, ADVANCED_RULES
+    ADVANCED_RULES = compile_rule_table(rule_table, {var: list(terms) for var, terms in MEMBERSHIP_PARAMS.items()})
+    ADVANCED_RULE_TABLE = list(rule_table)
+    if RULE_INDEX is not None:
+        enable_rule_index()
+
+def membership_params_key():
+    return tuple((var, tuple(terms.items())) for var, terms in MEMBERSHIP_PARAMS.items())
+
+def build_rule_index():
+    # Supports of the exact membership functions; with the LUT on, widened to cover the parameters its tables
+    # were built from, which the batch path reads while the scalar path stays exact
+    global RULE_INDEX, RULE_INDEX_SOURCE
+    supports = membership_supports()
+    if MEMBERSHIP_LUT is not None:
+        table = lut_supports()
+        supports = {key: (min(lo, table.get(key, (lo, hi))[0]), max(hi, table.get(key, (lo, hi))[1]))
+                    for key, (lo, hi) in supports.items()}
+    RULE_INDEX = compile_support_index(ADVANCED_RULES, supports)
+    RULE_INDEX_SOURCE = (membership_params_key(), MEMBERSHIP_LUT)
+    return RULE_INDEX
+
+def enable_rule_index():
+    RULE_INDEX_COUNTS.update(evaluated=0, possible=0)
+    return build_rule_index()
+
+def current_rule_index():
+    # The index, rebuilt first if MEMBERSHIP_PARAMS or the LUT changed since it was built
+    if RULE_INDEX_SOURCE[1] is not MEMBERSHIP_LUT or RULE_INDEX_SOURCE[0] != membership_params_key():
+        return build_rule_index()
+    return RULE_INDEX
+
+def disable_rule_index():
+    global RULE_INDEX
+    RULE_INDEX = None
+
+def rule_index_fraction():
+    # Average fraction of rules evaluated per patient since the index was enabled
+    return RULE_INDEX_COUNTS['evaluated'] / RULE_INDEX_COUNTS['possible'] if RULE_INDEX_COUNTS['possible'] else 1.0
+
+def count_rule_evaluations(evaluated, possible):
+    RULE_INDEX_COUNTS['evaluated'] += evaluated
+    RULE_INDEX_COUNTS['possible'] += possible
+    if PIPELINE_STATS is not None:
+        PIPELINE_STATS.rules_evaluated += evaluated
+        PIPELINE_STATS.rules_possible += possible
+
+def apply_advanced_rules(bp_fuzz, chol_fuzz, hr_fuzz, age_fuzz, smoke_fuzz, diabetes_fuzz, inputs=None):
+    # inputs are the raw values (bp, chol, hr, age, smoking, diabetes); with the rule index on they select the rules to fire
+    fuzz = {'bp': bp_fuzz, 'chol': chol_fuzz, 'hr': hr_fuzz, 'age': age_fuzz, 'smoking': smoke_fuzz, 'diabetes': diabetes_fuzz}
+    if RULE_INDEX is not None and inputs is not None:
+        rule_idx = active_rules(ADVANCED_RULES, current_rule_index(), inputs)
+        count_rule_evaluations(len(rule_idx), len(ADVANCED_RULES['rules']))
+        strengths = fire_rules_scalar(ADVANCED_RULES, fuzz, rule_idx)
+    else:
+        strengths = fire_rules_scalar(ADVANCED_RULES, fuzz)
+    # {'Healthy': [rule1, rule2], 'Middle': [rule3, rule4, rule10, ...], 'Sick': [rule5, ...]}
+    return group_by_class(ADVANCED_RULES, strengths)
+
+def fire_advanced_rules_batch(memberships, X=None):
+    # (N, n_columns) membership matrix -> (N, n_rules) strengths in ADVANCED_RULES order.
+    # X is the raw (N, 6) input; with the rule index on, patients are grouped by the rules they can fire.
+    if RULE_INDEX is not None and X is not None:
+        strengths, evaluated = fire_rules_indexed(ADVANCED_RULES, current_rule_index(), X, memberships)
+        count_rule_evaluations(evaluated, strengths.size)
+        return strengths
+    return fire_rules(ADVANCED_RULES, memberships)
+
+def apply_advanced_rules_batch(bp_m, chol_m, hr_m, age_m, smoke_m, diabetes_m, X=None):
+    # Same rules over (N, n_terms) membership matrices; columns follow MEMBERSHIP_PARAMS order
+    memberships = np.concatenate([bp_m, chol_m, hr_m, age_m, smoke_m, diabetes_m], axis=1)
+    # One (N, n_rules) matrix per class, rules in the same order as apply_advanced_rules
+    return group_by_class(ADVANCED_RULES, fire_advanced_rules_batch(memberships, X))
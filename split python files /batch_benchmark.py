@@ -0,0 +1,35 @@
+import time
+
+def random_patients(n, seed=0):
+    # Uniform cohort over the ranges used by the sensitivity analysis and synthetic data
+    rng = np.random.default_rng(seed)
+    low = np.array([90, 100, 50, 20, 0, 70])
+    high = np.array([210, 300, 150, 90, 2, 300])
+    return rng.uniform(low, high, size=(n, 6))
+
+def benchmark_diagnosis_batch(sizes=(1000, 100000, 1000000), scalar_size=1000):
+    print(f"\n{'Path':<10} {'Patients':>10} {'Seconds':>10} {'Patients/s':>14}")
+    print("-" * 48)
+    X = random_patients(scalar_size)
+    start = time.perf_counter()
+    scalar = [diagnose_patient_advanced(*row) for row in X]
+    elapsed = time.perf_counter() - start
+    print(f"{'scalar':<10} {scalar_size:>10} {elapsed:>10.3f} {scalar_size / elapsed:>14,.0f}")
+
+    # Batch path must agree with the scalar one before we time it
+    batch = diagnose_patients_batch(X)
+    assert np.allclose(batch['mamdani'], [r['mamdani'] for r in scalar])
+    assert np.allclose(batch['sugeno'], [r['sugeno'] for r in scalar])
+
+    results = {}
+    for n in sizes:
+        X = random_patients(n)
+        start = time.perf_counter()
+        diagnose_patients_batch(X)
+        elapsed = time.perf_counter() - start
+        results[n] = n / elapsed
+        print(f"{'batch':<10} {n:>10} {elapsed:>10.3f} {n / elapsed:>14,.0f}")
+    return results
+
+if __name__ == "__main__":
+    benchmark_diagnosis_batch()
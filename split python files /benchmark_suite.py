@@ -0,0 +1,209 @@
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from notebook_cells import load_advanced_system, load_neuro_fuzzy_system
+from parallel_utils import shared_row_map
+
+LOW = np.array([90, 100, 50, 20, 0, 70], dtype=float)
+HIGH = np.array([210, 300, 150, 90, 2, 300], dtype=float)
+
+def cohort(n, seed=0):
+    return np.random.default_rng(seed).uniform(LOW, HIGH, size=(n, 6))
+
+def build_cases(advanced, neuro):
+    # Each case maps a cohort size to a zero-argument callable; setup happens outside the timed call.
+    # max_size caps the per-patient Python paths so a run stays in minutes.
+    import fuzzy_chd
+
+    def original_scalar(n):
+        rows = cohort(n)[:, :3].tolist()
+        return lambda: [fuzzy_chd.diagnose_patient(*row) for row in rows]
+
+    def advanced_scalar(n):
+        rows = cohort(n).tolist()
+        return lambda: [advanced['diagnose_patient_advanced'](*row, use_cache=False) for row in rows]
+
+    def session_updates(n):
+        # n single-vital updates spread over 1000 monitored patients
+        rng = np.random.default_rng(0)
+        patients = cohort(1000).tolist()
+        which = rng.integers(6, size=n)
+        values = cohort(n, seed=1)[np.arange(n), which]
+        updates = [(int(p), advanced['VARIABLES'][v], x) for p, v, x in zip(rng.integers(1000, size=n), which, values.tolist())]
+        def run():
+            sessions = [advanced['PatientSession'](*row) for row in patients]
+            for p, var, x in updates:
+                sessions[p].update(**{var: x})
+        return run
+
+    def advanced_batch(n):
+        X = cohort(n)
+        return lambda: advanced['diagnose_patients_batch'](X)
+
+    def sensitivity(n):
+        # n base patients, 6 factors x 11 variations each
+        X = cohort(n)
+        return lambda: advanced['sensitivity_analysis_cohort'](X)
+
+    def neuro_fuzzy_predict(n):
+        model = neuro['NeuroFuzzyCHD']()
+        model.initialize_membership_functions()
+        X = cohort(n)
+        return lambda: model.predict(X)
+
+    def neuro_fuzzy_train(n):
+        data = neuro['generate_training_data'](n)
+        def run():
+            model = neuro['NeuroFuzzyCHD']()
+            model.initialize_membership_functions()
+            model.train_neuro_fuzzy(data[:, :6], data[:, 6], epochs=1, verbose=False)
+        return run
+
+    def nn_train(n):
+        data = neuro['generate_training_data'](n)
+        return lambda: neuro['SimpleNeuralNetwork'](hidden_size=12, seed=0).train(data[:, :6], data[:, 6], epochs=10, verbose=False)
+
+    def nn_train_minibatch(n):
+        data = neuro['generate_training_data'](n)
+        return lambda: neuro['SimpleNeuralNetwork'](hidden_size=12, seed=0).train_minibatch(
+            data[:, :6], data[:, 6], epochs=1, validation_split=0.0, seed=0, verbose=False)
+
+    def generate(n):
+        return lambda: neuro['generate_training_data'](n)
+
+    def shared_memory_scoring(workers):
+        def make(n):
+            X = cohort(n)
+            return lambda: shared_row_map(lambda block: advanced['diagnose_patients_batch'](block)['sugeno'], X, workers)
+        return make
+
+    def shared_memory_predict(workers):
+        def make(n):
+            model = neuro['NeuroFuzzyCHD']()
+            model.initialize_membership_functions()
+            X = cohort(n)
+            return lambda: shared_row_map(model.predict, X, workers)
+        return make
+
+    # Worker counts 1, 2, 4, ... up to the core count, for the parallel speedup
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({2 ** k for k in range(cores.bit_length()) if 2 ** k <= cores} | {cores})
+    parallel = {}
+    for workers in worker_counts:
+        parallel[f'diagnose_patients_batch[workers={workers}]'] = (shared_memory_scoring(workers), None)
+        parallel[f'NeuroFuzzyCHD.predict[workers={workers}]'] = (shared_memory_predict(workers), None)
+
+    return {
+        'fuzzy_chd.diagnose_patient': (original_scalar, 10000),
+        'diagnose_patient_advanced': (advanced_scalar, 10000),
+        'PatientSession.update': (session_updates, 100000),
+        'diagnose_patients_batch': (advanced_batch, None),
+        'sensitivity_analysis': (sensitivity, 100000),
+        'NeuroFuzzyCHD.predict': (neuro_fuzzy_predict, None),
+        'train_neuro_fuzzy': (neuro_fuzzy_train, None),
+        'SimpleNeuralNetwork.train': (nn_train, None),
+        'SimpleNeuralNetwork.train_minibatch': (nn_train_minibatch, None),
+        'generate_training_data': (generate, None),
+        **parallel,
+    }
+
+def measure(make_run, n, repeat):
+    run = make_run(n)
+    run()  # warm-up
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - start)
+    # Peak memory from a separate traced run so tracing does not skew the timings
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {'size': n, 'repeat': repeat, 'throughput': n / p50, 'p50_s': p50, 'p95_s': p95, 'p99_s': p99, 'peak_mb': peak / 2**20}
+
+def measure_import(module, repeat):
+    # Cold import time of a module, each run in a fresh interpreter
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get('PYTHONPATH')])))
+    latencies = [float(subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True).stdout)
+                 for _ in range(repeat)]
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {'size': 1, 'repeat': repeat, 'throughput': 1 / p50, 'p50_s': p50, 'p95_s': p95, 'p99_s': p99, 'peak_mb': 0.0}
+
+def run_suite(sizes, repeat=5, only=None, verbose=True):
+    results = {}
+    if not only or 'import chd_core' in only:
+        r = results['import chd_core@1'] = measure_import('chd_core', repeat)
+        if verbose:
+            print(f"{'import chd_core':<38} {'':>9} p50 {r['p50_s']*1e3:.1f}ms  p95 {r['p95_s']*1e3:.1f}ms")
+    advanced = load_advanced_system(['sensitivity_analysis.py'])
+    neuro = load_neuro_fuzzy_system()
+    for name, (make_run, max_size) in build_cases(advanced, neuro).items():
+        if only and name not in only:
+            continue
+        for n in sizes:
+            if max_size is not None and n > max_size:
+                continue
+            r = measure(make_run, n, repeat)
+            results[f"{name}@{n}"] = r
+            if verbose:
+                print(f"{name:<38} {n:>9} {r['throughput']:>14,.0f}/s  p50 {r['p50_s']*1e3:>9.2f}ms  "
+                      f"p95 {r['p95_s']*1e3:>9.2f}ms  p99 {r['p99_s']*1e3:>9.2f}ms  peak {r['peak_mb']:>8.1f}MB")
+    return {'meta': {'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.platform(),
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S')}, 'results': results}
+
+def compare(current, baseline, threshold, memory_threshold=None):
+    # A case regresses when its throughput drops (or peak memory grows) by more than the threshold fraction
+    regressions = []
+    for key, r in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        change = r['throughput'] / base['throughput'] - 1
+        line = f"{key:<48} {base['throughput']:>14,.0f} -> {r['throughput']:>14,.0f}/s ({change:+.1%})"
+        if change < -threshold:
+            regressions.append(line)
+        if memory_threshold is not None and base['peak_mb'] > 0 and r['peak_mb'] / base['peak_mb'] - 1 > memory_threshold:
+            regressions.append(f"{key:<48} peak {base['peak_mb']:.1f} -> {r['peak_mb']:.1f} MB")
+        print(line)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every CHD scoring and training path.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help="cohort sizes (default: 1000 10000 100000)")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per case and size (default: 5)")
+    parser.add_argument('--cases', nargs='+', help="only run these cases")
+    parser.add_argument('--save', metavar='JSON', help="write the results as a baseline")
+    parser.add_argument('--compare', metavar='JSON', help="compare against a saved baseline")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed throughput drop as a fraction (default: 0.2)")
+    parser.add_argument('--memory-threshold', type=float, help="allowed peak memory growth as a fraction (default: not checked)")
+    args = parser.parse_args(argv)
+    current = run_suite(args.sizes, args.repeat, args.cases)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline saved to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nComparison with {args.compare} (threshold {args.threshold:.0%}):")
+        regressions = compare(current, baseline, args.threshold, args.memory_threshold)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print("\nNo regressions.")
+
+if __name__ == "__main__":
+    main()
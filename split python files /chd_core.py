@@ -0,0 +1,47 @@
+
+import sys
+from notebook_cells import load_advanced_system, load_neuro_fuzzy_system
+from parallel_utils import shared_row_map
+
+# Headless scoring entry point. Importing it loads NumPy and the scoring cells only:
+# matplotlib, pandas, sklearn and scikit-fuzzy stay unloaded until a plotting or data-frame feature is used.
+ADVANCED_SYSTEM = load_advanced_system()
+
+VARIABLES = ADVANCED_SYSTEM['VARIABLES']
+CHD_LABELS = ADVANCED_SYSTEM['CHD_LABELS']
+diagnose_patient_advanced = ADVANCED_SYSTEM['diagnose_patient_advanced']
+diagnose_patients_batch = ADVANCED_SYSTEM['diagnose_patients_batch']
+classify_chd = ADVANCED_SYSTEM['classify_chd']
+
+HEAVY_MODULES = ['matplotlib', 'pandas', 'sklearn', 'skfuzzy']
+
+_NEURO_FUZZY_SYSTEM = None
+
+def neuro_fuzzy_system():
+    # Neuro-fuzzy cells are loaded on first use only
+    global _NEURO_FUZZY_SYSTEM
+    if _NEURO_FUZZY_SYSTEM is None:
+        _NEURO_FUZZY_SYSTEM = load_neuro_fuzzy_system()
+    return _NEURO_FUZZY_SYSTEM
+
+def neuro_fuzzy_model():
+    model = neuro_fuzzy_system()['NeuroFuzzyCHD']()
+    model.initialize_membership_functions()
+    return model
+
+def load_model(path, mmap_mode='c'):
+    # Trained NeuroFuzzyCHD or SimpleNeuralNetwork from save_model; weights are memory-mapped copy-on-write by
+    # default, mmap_mode='r' maps them read-only for scoring
+    return neuro_fuzzy_system()['load_model'](path, mmap_mode)
+
+def score_patients(X, output='sugeno', n_workers=1):
+    # (N, 6) patients in VARIABLES order -> (scores, labels); n_workers > 1 splits the rows over forked processes
+    scores = shared_row_map(lambda block: diagnose_patients_batch(block)[output], X, n_workers)
+    return scores, classify_chd(scores)
+
+def predict_neuro_fuzzy(model, X, n_workers=1):
+    return shared_row_map(model.predict, X, n_workers)
+
+def loaded_heavy_modules():
+    # Which optional libraries have been imported so far; a scoring worker expects []
+    return [name for name in HEAVY_MODULES if name in sys.modules]
@@ -0,0 +1,96 @@
+import hashlib
+import os
+from parallel_utils import shared_row_map
+
+SURFACE_BASE_PATIENT = [130, 190, 75, 50, 0.5, 110]  # inputs held fixed off the two axes, in VARIABLES order
+SURFACE_CACHE_DIR = 'surface_cache'
+
+def surface_key(x_var, y_var, x_range, y_range, resolution, base, output, mamdani_method):
+    # Digest of the grid request and of the rule, membership and defuzzification configuration
+    request = (x_var, y_var, tuple(map(float, x_range)), tuple(map(float, y_range)), tuple(resolution),
+               tuple(map(float, base)), output, mamdani_method or MAMDANI_METHOD)
+    return hashlib.sha256(repr((request, diagnosis_config_digest())).encode()).hexdigest()[:32]
+
+def surface_inputs(x_var, y_var, x, y, base):
+    # (len(y) * len(x), 6) patient matrix, row-major over (y, x), every other input at its base value
+    X = np.repeat(np.asarray(base, dtype=float)[None, :], len(x) * len(y), axis=0)
+    grid_x, grid_y = np.meshgrid(x, y)
+    X[:, VARIABLES.index(x_var)] = grid_x.ravel()
+    X[:, VARIABLES.index(y_var)] = grid_y.ravel()
+    return X
+
+def control_surface(x_var, y_var, resolution=200, x_range=None, y_range=None, base=None, output='sugeno', mamdani_method=None,
+                    cache_dir=SURFACE_CACHE_DIR, n_workers=1, chunk_size=262144):
+    # Engine output over a 2-D grid of two inputs -> {'x', 'y', 'z' (len(y), len(x)), ...}. Axes default to the
+    # membership universes; resolution is one size or (nx, ny). The grid is scored with diagnose_patients_batch in
+    # chunk_size row blocks (optionally split over forked workers) and cached in cache_dir; cache_dir=None skips the cache.
+    for var in (x_var, y_var):
+        if var not in VARIABLES:
+            raise ValueError(f"Unknown input {var!r}, expected one of {VARIABLES}")
+    if x_var == y_var:
+        raise ValueError("The two axes must be different inputs")
+    if output not in ('sugeno', 'mamdani'):
+        raise ValueError(f"Unknown output {output!r}, expected 'sugeno' or 'mamdani'")
+    nx, ny = (resolution, resolution) if np.ndim(resolution) == 0 else resolution
+    x_range = membership_universe(x_var) if x_range is None else x_range
+    y_range = membership_universe(y_var) if y_range is None else y_range
+    base = SURFACE_BASE_PATIENT if base is None else base
+    x = np.linspace(x_range[0], x_range[1], nx)
+    y = np.linspace(y_range[0], y_range[1], ny)
+
+    path = None
+    if cache_dir is not None:
+        key = surface_key(x_var, y_var, x_range, y_range, (nx, ny), base, output, mamdani_method)
+        path = os.path.join(cache_dir, f"surface_{key}.npz")
+        if os.path.exists(path):
+            with np.load(path) as cached:
+                return {'x_var': x_var, 'y_var': y_var, 'x': x, 'y': y, 'z': cached['z'], 'output': output, 'cached': True}
+
+    def score(block):
+        out = np.empty(len(block))
+        for start in range(0, len(block), chunk_size):
+            out[start:start + chunk_size] = diagnose_patients_batch(block[start:start + chunk_size], mamdani_method)[output]
+        return out
+    z = shared_row_map(score, surface_inputs(x_var, y_var, x, y, base), n_workers).reshape(ny, nx)
+
+    if path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, 'wb') as f:
+            np.savez(f, z=z)
+        os.replace(tmp, path)
+    return {'x_var': x_var, 'y_var': y_var, 'x': x, 'y': y, 'z': z, 'output': output, 'cached': False}
+
+def control_surfaces(pairs=None, **options):
+    # Several surfaces, by default every pair of inputs
+    if pairs is None:
+        pairs = [(VARIABLES[i], VARIABLES[j]) for i in range(len(VARIABLES)) for j in range(i + 1, len(VARIABLES))]
+    return [control_surface(x_var, y_var, **options) for x_var, y_var in pairs]
+
+def render_control_surface(surface, path=None, kind='heatmap', dpi=150, max_mesh=100):
+    # Heatmap with the label thresholds as contours, or a 3-D surface drawn on at most max_mesh x max_mesh
+    # facets. Uses a bare Figure, so no display is needed; returns the figure.
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(8, 6))
+    x, y, z = surface['x'], surface['y'], surface['z']
+    if kind == 'heatmap':
+        ax = fig.add_subplot(1, 1, 1)
+        image = ax.imshow(z, origin='lower', extent=(x[0], x[-1], y[0], y[-1]), aspect='auto', cmap='RdYlGn_r', vmin=0, vmax=4)
+        ax.contour(x, y, z, levels=CHD_LABEL_THRESHOLDS, colors='black', linewidths=1)
+        fig.colorbar(image, ax=ax, label=f"CHD ({surface['output']})")
+    elif kind == 'surface':
+        ax = fig.add_subplot(1, 1, 1, projection='3d')
+        grid_x, grid_y = np.meshgrid(x, y)
+        mesh = ax.plot_surface(grid_x, grid_y, z, cmap='RdYlGn_r', vmin=0, vmax=4, rcount=min(len(y), max_mesh),
+                               ccount=min(len(x), max_mesh), linewidth=0)
+        ax.set_zlabel(f"CHD ({surface['output']})")
+        ax.set_zlim(0, 4)
+        fig.colorbar(mesh, ax=ax, shrink=0.6)
+    else:
+        raise ValueError(f"Unknown kind {kind!r}, expected 'heatmap' or 'surface'")
+    ax.set_xlabel(surface['x_var'])
+    ax.set_ylabel(surface['y_var'])
+    ax.set_title(f"CHD control surface: {surface['x_var']} x {surface['y_var']}")
+    if path:
+        fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig
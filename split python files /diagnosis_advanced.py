@@ -1,4 +1,12 @@
-def diagnose_patient_advanced(bp, chol, hr, age, smoking, diabetes, verbose=False):
+DIAGNOSIS_CACHE = None  # LRU result cache when enabled, see diagnosis_cache.py
+
+def diagnose_patient_advanced(bp, chol, hr, age, smoking, diabetes, verbose=False, use_cache=True, mamdani_method=None):
+    # mamdani_method overrides MAMDANI_METHOD for this call ('singleton', 'centroid', 'bisector' or 'mom')
+    if use_cache and DIAGNOSIS_CACHE is not None and not verbose and mamdani_method is None:
+        return DIAGNOSIS_CACHE.diagnose(bp, chol, hr, age, smoking, diabetes)
+    stats = PIPELINE_STATS
+    if stats is not None:
+        t0 = time.perf_counter()
     # Fuzzification
     bp_fuzz = fuzzify_bp(bp)
     chol_fuzz = fuzzify_chol(chol)
@@ -6,13 +14,27 @@ def diagnose_patient_advanced(bp, chol, hr, age, smoking, diabetes, verbose=Fals
     age_fuzz = fuzzify_age(age)
     smoke_fuzz = fuzzify_smoking(smoking)
     diabetes_fuzz = fuzzify_diabetes(diabetes)
+    if stats is not None:
+        t1 = time.perf_counter()
     # Apply rules
-    rules = apply_advanced_rules(bp_fuzz, chol_fuzz, hr_fuzz, age_fuzz, smoke_fuzz, diabetes_fuzz)
+    rules = apply_advanced_rules(bp_fuzz, chol_fuzz, hr_fuzz, age_fuzz, smoke_fuzz, diabetes_fuzz, (bp, chol, hr, age, smoking, diabetes))
+    if stats is not None:
+        t2 = time.perf_counter()
     # Mamdani inference
     aggregated_mamdani = aggregate_rules_mamdani(rules)
-    mamdani_result = defuzzify_mamdani_cog(aggregated_mamdani)
+    if stats is not None:
+        t3 = time.perf_counter()
+    mamdani_result = defuzzify_mamdani(aggregated_mamdani, mamdani_method)
     # Sugeno inference
     sugeno_result = defuzzify_sugeno_weighted_average(rules)
+    if stats is not None:
+        t4 = time.perf_counter()
+        stats.calls['scalar'] += 1
+        stats.record_stage('fuzzification', t1 - t0)
+        stats.record_stage('rules', t2 - t1)
+        stats.record_stage('aggregation', t3 - t2)
+        stats.record_stage('defuzzification', t4 - t3)
+        stats.record_firing(sum(1 for strengths in rules.values() for s in strengths if s > 0))
     if verbose:
         print(f"\nPatient: BP={bp}, Chol={chol}, HR={hr}, Age={age}, Smoking={smoking}, Diabetes={diabetes}")
         print("\nFuzzification Results:")
@@ -22,13 +44,70 @@ def diagnose_patient_advanced(bp, chol, hr, age, smoking, diabetes, verbose=Fals
         print(f"  Age: Young={age_fuzz['Young']:.3f}, Middle={age_fuzz['Middle']:.3f}, Old={age_fuzz['Old']:.3f}")
         print(f"  Smoking: None={smoke_fuzz['None']:.3f}, Light={smoke_fuzz['Light']:.3f}, Heavy={smoke_fuzz['Heavy']:.3f}")
         print(f"  Diabetes: No={diabetes_fuzz['No']:.3f}, Pre={diabetes_fuzz['Pre']:.3f}, Yes={diabetes_fuzz['Yes']:.3f}")
-        print("\nRule Strengths (Sick rules especially):")
-        print(f"  Rule5(Sick): {rules['Sick'][0]:.3f}")
-        print(f"  Rule6(Sick): {rules['Sick'][1]:.3f}")
-        print(f"  Rule7(Sick - Age): {rules['Sick'][2]:.3f}")
-        print(f"  Rule8(Sick - Smoking): {rules['Sick'][3]:.3f}")
-        print(f"  Rule9(Sick - Diabetes): {rules['Sick'][4]:.3f}")
-        print(f"\nMamdani COG Result: {mamdani_result:.3f}")
+        print("\nRule Strengths:")
+        # Labels come from the rule table, so they follow the class lists whatever the rule order
+        for category, rule_idx in ADVANCED_RULES['class_rules'].items():
+            for strength, r in zip(rules[category], rule_idx):
+                print(f"  {ADVANCED_RULES['names'][r]}({describe_rule(ADVANCED_RULES['rules'][r])}): {strength:.3f}")
+        print(f"\nMamdani ({mamdani_method or MAMDANI_METHOD}) Result: {mamdani_result:.3f}")
         print(f"Sugeno Result: {sugeno_result:.3f}")
         print(f"Difference (Mamdani - Sugeno): {mamdani_result - sugeno_result:.3f}")
     return {'mamdani': mamdani_result, 'sugeno': sugeno_result, 'rules': rules, 'aggregated': aggregated_mamdani}
+
+def fuzzify_patients_batch(X):
+    # X is (N, 6) in VARIABLES order: bp, chol, hr, age, smoking, diabetes
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    return {var: fuzzify_variable_batch(var, X[:, col]) for col, var in enumerate(VARIABLES)}
+
+def diagnose_patients_batch(X, mamdani_method=None):
+    # Whole-cohort version of diagnose_patient_advanced; every value is an array with one row per patient
+    stats = PIPELINE_STATS
+    if stats is not None:
+        t0 = time.perf_counter()
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    fuzz = fuzzify_patients_batch(X)
+    if stats is not None:
+        t1 = time.perf_counter()
+    rules = apply_advanced_rules_batch(fuzz['bp'], fuzz['chol'], fuzz['hr'], fuzz['age'], fuzz['smoking'], fuzz['diabetes'], X)
+    if stats is not None:
+        t2 = time.perf_counter()
+    aggregated_mamdani = aggregate_rules_mamdani_batch(rules)
+    if stats is not None:
+        t3 = time.perf_counter()
+    mamdani_result = defuzzify_mamdani_batch(aggregated_mamdani, mamdani_method)
+    sugeno_result = defuzzify_sugeno_weighted_average_batch(rules)
+    if stats is not None:
+        t4 = time.perf_counter()
+        stats.calls['batch'] += 1
+        stats.calls['batch_patients'] += len(mamdani_result)
+        stats.record_stage('batch_fuzzification', t1 - t0)
+        stats.record_stage('batch_rules', t2 - t1)
+        stats.record_stage('batch_aggregation', t3 - t2)
+        stats.record_stage('batch_defuzzification', t4 - t3)
+        stats.record_firing(sum(np.count_nonzero(strengths > 0, axis=1) for strengths in rules.values()))
+    return {'mamdani': mamdani_result, 'sugeno': sugeno_result, 'rules': rules, 'aggregated': aggregated_mamdani}
+
+CHD_LABELS = np.array(['Healthy', 'Middle', 'Sick'])
+CHD_LABEL_THRESHOLDS = [1.5, 2.5]  # same cut points as the sensitivity plot
+
+def classify_chd(scores):
+    # Crisp class label for each defuzzified score
+    return CHD_LABELS[np.digitize(scores, CHD_LABEL_THRESHOLDS)]
+
+def advanced_rule_strengths(X):
+    # (N, 6) patients -> (N, n_rules) strengths of ADVANCED_RULES
+    fuzz = fuzzify_patients_batch(X)
+    return fire_rules(ADVANCED_RULES, np.concatenate([fuzz[var] for var in VARIABLES], axis=1))
+
+def sweep_hedges_advanced(X, hedges=HEDGES, rules=None, mamdani_method=None):
+    # Every (rule, hedge) pair over a cohort: the rules fire once, then each hedge is a modifier on the strength matrix.
+    # rules are 1-based rule numbers (default all); 'sugeno'/'mamdani' are (n_rules, n_hedges, N)
+    rule_idx = None if rules is None else [r - 1 for r in rules]
+    return hedge_sweep(ADVANCED_RULES, advanced_rule_strengths(X), [HEALTHY_CENTER, MIDDLE_CENTER, SICK_CENTER], hedges, rule_idx,
+                       method=mamdani_method or MAMDANI_METHOD, grid=OUTPUT_GRID, implication=MAMDANI_IMPLICATION)
+
+def sweep_rule_weights_advanced(X, weights, mamdani_method=None):
+    # weights is (n_candidates, n_rules), e.g. from rule_weight_grid; outputs are (n_candidates, N).
+    # Rank candidates against outcomes with sweep_errors(result, y)
+    return weight_sweep(ADVANCED_RULES, advanced_rule_strengths(X), [HEALTHY_CENTER, MIDDLE_CENTER, SICK_CENTER], weights,
+                        method=mamdani_method or MAMDANI_METHOD, grid=OUTPUT_GRID, implication=MAMDANI_IMPLICATION)
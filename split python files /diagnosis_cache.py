@@ -0,0 +1,78 @@
+import hashlib
+from collections import OrderedDict
+
+def diagnosis_config():
+    # Everything a diagnosis depends on besides the inputs
+    params = tuple((var, tuple(terms.items())) for var, terms in MEMBERSHIP_PARAMS.items())
+    lut = None if MEMBERSHIP_LUT is None else (MEMBERSHIP_LUT['resolution'], MEMBERSHIP_LUT['interpolate'])
+    mamdani = (MAMDANI_METHOD, MAMDANI_IMPLICATION, OUTPUT_GRID['fingerprint'])
+    return (params, ADVANCED_RULES['fingerprint'], lut, mamdani)
+
+def diagnosis_config_fingerprint():
+    return hash(diagnosis_config())
+
+def diagnosis_config_digest():
+    # Same configuration as a digest that is stable across processes (hash() of strings is salted per run),
+    # for keys stored on disk
+    return hashlib.sha256(repr(diagnosis_config()).encode()).hexdigest()
+
+def copy_result(result):
+    # diagnose_patient_advanced layout with fresh containers; the values themselves are floats
+    return {'mamdani': result['mamdani'], 'sugeno': result['sugeno'], 'rules': {c: list(v) for c, v in result['rules'].items()},
+            'aggregated': dict(result['aggregated'])}
+
+class DiagnosisCache:
+    # Bounded LRU cache of diagnose_patient_advanced results keyed on (optionally quantized) inputs.
+    # quantize maps a variable to a step; inputs are rounded to that step and scored at the rounded value.
+    def __init__(self, maxsize=100000, quantize=None):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.quantize = dict(quantize or {})
+        self.steps = [self.quantize.get(var) for var in VARIABLES]
+        self.entries = OrderedDict()
+        self.fingerprint = diagnosis_config_fingerprint()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def key(self, inputs):
+        return tuple(x if step is None else round(x / step) * step for x, step in zip(inputs, self.steps))
+
+    def clear(self):
+        self.entries.clear()
+
+    def diagnose(self, *inputs):
+        # Every caller gets its own copy, so changing a result never reaches later hits
+        fingerprint = diagnosis_config_fingerprint()
+        if fingerprint != self.fingerprint:
+            self.entries.clear()
+            self.fingerprint = fingerprint
+            self.invalidations += 1
+        key = self.key(inputs)
+        result = self.entries.get(key)
+        if result is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return copy_result(result)
+        self.misses += 1
+        result = diagnose_patient_advanced(*key, use_cache=False)
+        self.entries[key] = result
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return copy_result(result)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'invalidations': self.invalidations,
+                'size': len(self.entries), 'maxsize': self.maxsize, 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+def enable_diagnosis_cache(maxsize=100000, quantize=None):
+    # Scalar diagnose_patient_advanced calls go through the cache until disabled. The batch callers
+    # (diagnose_patients_batch, the columnar results, compare_systems and sensitivity_analysis) never do.
+    global DIAGNOSIS_CACHE
+    DIAGNOSIS_CACHE = DiagnosisCache(maxsize, quantize)
+    return DIAGNOSIS_CACHE
+
+def disable_diagnosis_cache():
+    global DIAGNOSIS_CACHE
+    DIAGNOSIS_CACHE = None
@@ -0,0 +1,153 @@
+import tracemalloc
+
+# One float64 field per input, in VARIABLES order: a cohort is one structured array instead of a list of dicts
+PATIENT_DTYPE = np.dtype([(var, np.float64) for var in VARIABLES])
+
+class PatientRecord:
+    # A single patient's inputs; __slots__ leaves out the per-instance __dict__
+    __slots__ = tuple(VARIABLES)
+
+    def __init__(self, bp, chol, hr, age, smoking, diabetes):
+        for var, x in zip(VARIABLES, (bp, chol, hr, age, smoking, diabetes)):
+            setattr(self, var, float(x))
+
+    def as_tuple(self):
+        return tuple(getattr(self, var) for var in VARIABLES)
+
+    def as_dict(self):
+        return {var: getattr(self, var) for var in VARIABLES}
+
+    def __repr__(self):
+        return f"PatientRecord({', '.join(f'{var}={getattr(self, var)}' for var in VARIABLES)})"
+
+def patient_records(patients):
+    # (N, 6) rows, PatientRecords or dicts keyed by VARIABLES -> structured array of PATIENT_DTYPE
+    patients = list(patients) if not isinstance(patients, np.ndarray) else patients
+    if isinstance(patients, np.ndarray) and patients.dtype == PATIENT_DTYPE:
+        return patients
+    if len(patients) and isinstance(patients[0], PatientRecord):
+        patients = [p.as_tuple() for p in patients]
+    elif len(patients) and isinstance(patients[0], dict):
+        patients = [tuple(p[var] for var in VARIABLES) for p in patients]
+    rows = np.asarray(patients, dtype=float).reshape(-1, len(VARIABLES))
+    records = np.empty(len(rows), dtype=PATIENT_DTYPE)
+    for col, var in enumerate(VARIABLES):
+        records[var] = rows[:, col]
+    return records
+
+def patient_matrix(patients):
+    # Structured records or anything array-like -> (N, 6) float matrix for the batch pipeline
+    if isinstance(patients, np.ndarray) and patients.dtype == PATIENT_DTYPE:
+        return np.column_stack([patients[var] for var in VARIABLES])
+    return np.atleast_2d(np.asarray(patients, dtype=float))
+
+class DiagnosisResults:
+    # Columnar results for a cohort: memberships (N, n_columns) in membership column order, rule strengths
+    # (N, n_rules) in rule table order, class aggregates (N, n_classes) and both outputs (N,), all of one dtype.
+    # patient(i) and batch_view() rebuild the dict layouts of diagnose_patient_advanced and diagnose_patients_batch.
+    __slots__ = ('compiled', 'memberships', 'strengths', 'aggregated', 'mamdani', 'sugeno')
+
+    def __init__(self, n, dtype=np.float64, compiled=None):
+        self.compiled = ADVANCED_RULES if compiled is None else compiled
+        self.memberships = np.empty((n, self.compiled['n_columns']), dtype=dtype)
+        self.strengths = np.empty((n, len(self.compiled['rules'])), dtype=dtype)
+        self.aggregated = np.empty((n, len(self.compiled['classes'])), dtype=dtype)
+        self.mamdani = np.empty(n, dtype=dtype)
+        self.sugeno = np.empty(n, dtype=dtype)
+
+    def __len__(self):
+        return len(self.sugeno)
+
+    @property
+    def dtype(self):
+        return self.sugeno.dtype
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.__slots__[1:])
+
+    def __getitem__(self, key):
+        # Integer -> the old per-patient dict; slice, mask or index array -> DiagnosisResults over those rows
+        if isinstance(key, (int, np.integer)):
+            return self.patient(key)
+        subset = DiagnosisResults.__new__(DiagnosisResults)
+        subset.compiled = self.compiled
+        for name in self.__slots__[1:]:
+            setattr(subset, name, getattr(self, name)[key])
+        return subset
+
+    def membership(self, variable):
+        # (N, n_terms) membership matrix of one variable
+        columns = [col for (var, _), col in self.compiled['columns'].items() if var == variable]
+        return self.memberships[:, columns[0]:columns[-1] + 1]
+
+    def fuzzified(self, i):
+        # {'bp': {'Low': .., ..}, ..} as returned by the scalar fuzzifiers
+        fuzz = {}
+        row = self.memberships[i].tolist()
+        for (var, term), col in self.compiled['columns'].items():
+            fuzz.setdefault(var, {})[term] = row[col]
+        return fuzz
+
+    def rules(self, i):
+        row = self.strengths[i].tolist()
+        return {c: [row[r] for r in idx] for c, idx in self.compiled['class_rules'].items()}
+
+    def patient(self, i):
+        return {'mamdani': float(self.mamdani[i]), 'sugeno': float(self.sugeno[i]), 'rules': self.rules(i),
+                'aggregated': dict(zip(self.compiled['classes'], self.aggregated[i].tolist()))}
+
+    def batch_view(self):
+        # diagnose_patients_batch layout; the arrays are views, nothing is copied
+        return {'mamdani': self.mamdani, 'sugeno': self.sugeno,
+                'rules': {c: self.strengths[:, idx] for c, idx in self.compiled['class_rules'].items()},
+                'aggregated': {c: self.aggregated[:, k] for k, c in enumerate(self.compiled['classes'])}}
+
+def diagnose_patients_columnar(patients, dtype=np.float64, mamdani_method=None, chunk_size=262144):
+    # diagnose_patients_batch into a DiagnosisResults; computed in float64 chunk by chunk and stored as dtype,
+    # so float32 halves the memory without changing how the results are computed
+    X = patient_matrix(patients)
+    results = DiagnosisResults(len(X), dtype)
+    classes = ADVANCED_RULES['classes']
+    for start in range(0, len(X), chunk_size):
+        block = X[start:start + chunk_size]
+        stop = start + len(block)
+        fuzz = fuzzify_patients_batch(block)
+        memberships = np.concatenate([fuzz[var] for var in VARIABLES], axis=1)
+        strengths = fire_advanced_rules_batch(memberships, block)
+        rules = group_by_class(ADVANCED_RULES, strengths)
+        aggregated = aggregate_rules_mamdani_batch(rules)
+        results.memberships[start:stop] = memberships
+        results.strengths[start:stop] = strengths
+        results.aggregated[start:stop] = np.column_stack([aggregated[c] for c in classes])
+        results.mamdani[start:stop] = defuzzify_mamdani_batch(aggregated, mamdani_method)
+        results.sugeno[start:stop] = defuzzify_sugeno_weighted_average_batch(rules)
+    return results
+
+def retained_bytes(build):
+    # Memory still allocated by the object build() returns, measured with tracemalloc
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del obj
+    return retained
+
+def measure_result_memory(n=20000, seed=0):
+    # Bytes per patient: per-patient dicts (inputs as dicts, diagnose_patient_advanced results) vs records and columns
+    rng = np.random.default_rng(seed)
+    X = rng.uniform([90, 100, 50, 20, 0, 70], [210, 300, 150, 90, 2, 300], size=(n, 6))
+    rows = X.tolist()
+    sizes = {
+        'inputs: list of dicts': retained_bytes(lambda: [dict(zip(VARIABLES, row)) for row in rows]),
+        'inputs: list of PatientRecord': retained_bytes(lambda: [PatientRecord(*row) for row in rows]),
+        'inputs: structured array': retained_bytes(lambda: patient_records(X)),
+        'results: list of dicts': retained_bytes(lambda: [diagnose_patient_advanced(*row, use_cache=False) for row in rows]),
+        'results: DiagnosisResults float64': retained_bytes(lambda: diagnose_patients_columnar(X)),
+        'results: DiagnosisResults float32': retained_bytes(lambda: diagnose_patients_columnar(X, np.float32)),
+    }
+    print(f"\n{'Representation':<36} {'Bytes/patient':>14}")
+    for name, size in sizes.items():
+        print(f"{name:<36} {size / n:>14.1f}")
+    return {name: size / n for name, size in sizes.items()}
@@ -1,6 +1,7 @@
 
 import numpy as np
-import matplotlib.pyplot as plt
+from fuzzy_rule_engine import (CHD_RULE_TABLE, HEDGES, compile_output_grid, compile_rule_table, fire_rules, fire_rules_scalar, group_by_class,
+                               hedge_sweep, mamdani_defuzzify, weight_sweep)
 
 def triangular(x, a, b, c):
     if x <= a or x >= c:
@@ -24,11 +25,32 @@ def trapezoidal(x, a, b, c, d):
     else:
         return 0
 
+def triangular_batch(x, a, b, c):
+    x = np.asarray(x, dtype=float)
+    mu = np.zeros(x.shape)
+    rising = (x > a) & (x <= b) & (x < c)
+    falling = (x > b) & (x < c)
+    mu[rising] = (x[rising] - a) / (b - a)
+    mu[falling] = (c - x[falling]) / (c - b)
+    return mu
+
+def trapezoidal_batch(x, a, b, c, d):
+    x = np.asarray(x, dtype=float)
+    mu = np.zeros(x.shape)
+    inside = (x > a) & (x < d)
+    rising = inside & (x <= b)
+    plateau = inside & (x > b) & (x <= c)
+    falling = inside & (x > c)
+    mu[rising] = (x[rising] - a) / (b - a)
+    mu[plateau] = 1.0
+    mu[falling] = (d - x[falling]) / (d - c)
+    return mu
+
 def indeed(mu):
-    return mu ** 2
+    return mu ** HEDGES['indeed']
 
 def somewhat(mu):
-    return np.sqrt(mu)
+    return mu ** HEDGES['somewhat']
 
 def fuzzify_bp(bp):
     return {'Low': triangular(bp, 100, 115, 130),'Medium': triangular(bp, 120, 145, 170),'High': triangular(bp, 160, 180, 200)}
@@ -39,27 +61,31 @@ def fuzzify_chol(chol):
 def fuzzify_hr(hr):
     return {'Slow': triangular(hr, 50, 65, 80),'Moderate': triangular(hr, 70, 85, 100),'Fast': triangular(hr, 90, 145, 200)}
 
+# Batch fuzzification: (N,) column -> (N, n_terms) matrix, columns in the same order as the dicts above
+def fuzzify_bp_batch(bp):
+    return np.column_stack([triangular_batch(bp, 100, 115, 130), triangular_batch(bp, 120, 145, 170), triangular_batch(bp, 160, 180, 200)])
+
+def fuzzify_chol_batch(chol):
+    return np.column_stack([trapezoidal_batch(chol, 100, 120, 180, 200), trapezoidal_batch(chol, 180, 200, 260, 280)])
+
+def fuzzify_hr_batch(hr):
+    return np.column_stack([triangular_batch(hr, 50, 65, 80), triangular_batch(hr, 70, 85, 100), triangular_batch(hr, 90, 145, 200)])
+
+# The original system uses the first six (BP, cholesterol, heart rate) rules of the shared table
+RULE_TABLE = CHD_RULE_TABLE[:6]
+RULES = compile_rule_table(RULE_TABLE, {'bp': ['Low', 'Medium', 'High'], 'chol': ['Low', 'High'], 'hr': ['Slow', 'Moderate', 'Fast']})
+
 def apply_rules(bp_fuzz, chol_fuzz, hr_fuzz, use_hedges=False, hedge_type=None, rule_to_modify=None):
-    rule1 = min(bp_fuzz['Low'], chol_fuzz['Low'], hr_fuzz['Slow'])
-    rule2 = min(bp_fuzz['Low'], chol_fuzz['Low'], hr_fuzz['Moderate'])
-    rule3 = min(bp_fuzz['Medium'], chol_fuzz['Low'], hr_fuzz['Moderate'])
-    rule4 = min(bp_fuzz['Medium'], chol_fuzz['High'], hr_fuzz['Slow'])
-    rule5 = min(bp_fuzz['High'], chol_fuzz['Low'], hr_fuzz['Moderate'])
-    rule6 = min(bp_fuzz['High'], chol_fuzz['High'], hr_fuzz['Fast'])
-    
-    rules = {'Healthy': [rule1, rule2],'Middle': [rule3, rule4],'Sick': [rule5, rule6]}
-    
-    if use_hedges and hedge_type and rule_to_modify:
-        rule_map = {1: ('Healthy', 0), 2: ('Healthy', 1),3: ('Middle', 0),4: ('Middle', 1),5: ('Sick', 0),6: ('Sick', 1)}
-        if rule_num in rule_map:
-            category, idx = rule_map[rule_num]
-            original_value = rules[category][idx]
-            if hedge_type == 'indeed':
-                rules[category][idx] = indeed(original_value)
-            elif hedge_type == 'somewhat':
-                rules[category][idx] = somewhat(original_value)
-    
-    return rules
+    strengths = fire_rules_scalar(RULES, {'bp': bp_fuzz, 'chol': chol_fuzz, 'hr': hr_fuzz})
+    # rule_to_modify is the 1-based rule number; the hedge raises that rule's strength to its power in HEDGES
+    if use_hedges:
+        if hedge_type not in HEDGES:
+            raise ValueError(f"Unknown hedge {hedge_type!r}, expected one of {list(HEDGES)}")
+        if (not isinstance(rule_to_modify, (int, np.integer)) or isinstance(rule_to_modify, bool)
+                or not 1 <= rule_to_modify <= len(strengths)):
+            raise ValueError(f"rule_to_modify must be a rule number from 1 to {len(strengths)}, got {rule_to_modify!r}")
+        strengths[rule_to_modify - 1] **= HEDGES[hedge_type]
+    return group_by_class(RULES, strengths)
 
 def aggregate_rules(rules):
     return {'Healthy': max(rules['Healthy']),'Middle': max(rules['Middle']),'Sick': max(rules['Sick'])}
@@ -79,6 +105,17 @@ def defuzzify_cog(aggregated):
         return 0
     return numerator / denominator
 
+OUTPUT_GRID = compile_output_grid()
+
+def defuzzify_mamdani(aggregated, method='singleton', implication='clip'):
+    # 'singleton' is defuzzify_cog; centroid, bisector and mom integrate the output sets on OUTPUT_GRID
+    if method == 'singleton':
+        return defuzzify_cog(aggregated)
+    strengths = [[aggregated[c] for c in OUTPUT_GRID['classes']]]
+    if not any(strengths[0]):
+        return 0
+    return float(mamdani_defuzzify(OUTPUT_GRID, strengths, method, implication)[0])
+
 def defuzzify_sugeno(rules):
     all_rules = []
     all_values = []
@@ -100,13 +137,30 @@ def defuzzify_sugeno(rules):
     denominator = sum(all_rules)
     return numerator / denominator
 
-def diagnose_patient(bp, chol, hr, use_hedges=False, hedge_type=None, rule_to_modify=None, verbose=False):
+def diagnose_patient(bp, chol, hr, use_hedges=False, hedge_type=None, rule_to_modify=None, verbose=False, mamdani_method='singleton'):
     bp_fuzz = fuzzify_bp(bp)
     chol_fuzz = fuzzify_chol(chol)
     hr_fuzz = fuzzify_hr(hr)
     rules = apply_rules(bp_fuzz, chol_fuzz, hr_fuzz, use_hedges, hedge_type, rule_to_modify)
     aggregated = aggregate_rules(rules)
-    cog_result = defuzzify_cog(aggregated)
+    cog_result = defuzzify_mamdani(aggregated, mamdani_method)
     sugeno_result = defuzzify_sugeno(rules)
     details = {'bp_fuzz': bp_fuzz,'chol_fuzz': chol_fuzz,'hr_fuzz': hr_fuzz,'rules': rules,'aggregated': aggregated}
     return cog_result, sugeno_result, details
+
+def fire_rules_batch(X):
+    # (N, 3) bp, chol, hr -> (N, 6) rule strengths
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    return fire_rules(RULES, np.concatenate([fuzzify_bp_batch(X[:, 0]), fuzzify_chol_batch(X[:, 1]), fuzzify_hr_batch(X[:, 2])], axis=1))
+
+def sweep_hedges(X, hedges=HEDGES, rules=None, mamdani_method='singleton'):
+    # Every (rule, hedge) pair over a cohort in one pass: 'sugeno'/'mamdani' are (n_rules, n_hedges, N).
+    # rules are 1-based rule numbers, as for diagnose_patient's rule_to_modify
+    rule_idx = None if rules is None else [r - 1 for r in rules]
+    return hedge_sweep(RULES, fire_rules_batch(X), [HEALTHY_CENTER, MIDDLE_CENTER, SICK_CENTER], hedges, rule_idx,
+                       method=mamdani_method, grid=OUTPUT_GRID)
+
+def sweep_rule_weights(X, weights, mamdani_method='singleton'):
+    # weights is (n_candidates, 6), e.g. from fuzzy_rule_engine.rule_weight_grid; outputs are (n_candidates, N)
+    return weight_sweep(RULES, fire_rules_batch(X), [HEALTHY_CENTER, MIDDLE_CENTER, SICK_CENTER], weights,
+                        method=mamdani_method, grid=OUTPUT_GRID)
@@ -0,0 +1,406 @@
+
+import bisect
+import itertools
+import numpy as np
+
+CLASSES = ['Healthy', 'Middle', 'Sick']
+
+# CHD rule base as data: antecedents are (variable, term) pairs combined with the t-norm,
+# the consequent is an output class and the firing strength is scaled by the weight.
+CHD_RULE_TABLE = [
+    {'name': 'Rule1', 'if': [('bp', 'Low'), ('chol', 'Low'), ('hr', 'Slow')], 'tnorm': 'min', 'then': 'Healthy', 'weight': 1.0},
+    {'name': 'Rule2', 'if': [('bp', 'Low'), ('chol', 'Low'), ('hr', 'Moderate')], 'tnorm': 'min', 'then': 'Healthy', 'weight': 1.0},
+    {'name': 'Rule3', 'if': [('bp', 'Medium'), ('chol', 'Low'), ('hr', 'Moderate')], 'tnorm': 'min', 'then': 'Middle', 'weight': 1.0},
+    {'name': 'Rule4', 'if': [('bp', 'Medium'), ('chol', 'High'), ('hr', 'Slow')], 'tnorm': 'min', 'then': 'Middle', 'weight': 1.0},
+    {'name': 'Rule5', 'if': [('bp', 'High'), ('chol', 'Low'), ('hr', 'Moderate')], 'tnorm': 'min', 'then': 'Sick', 'weight': 1.0},
+    {'name': 'Rule6', 'if': [('bp', 'High'), ('chol', 'High'), ('hr', 'Fast')], 'tnorm': 'min', 'then': 'Sick', 'weight': 1.0},
+    # additional factors
+    {'name': 'Rule7', 'if': [('age', 'Old')], 'tnorm': 'min', 'then': 'Sick', 'weight': 1.0},
+    {'name': 'Rule8', 'if': [('smoking', 'Heavy')], 'tnorm': 'min', 'then': 'Sick', 'weight': 1.0},
+    {'name': 'Rule9', 'if': [('diabetes', 'Yes')], 'tnorm': 'min', 'then': 'Sick', 'weight': 1.0},
+    {'name': 'Rule10', 'if': [('age', 'Middle'), ('smoking', 'Light')], 'tnorm': 'min', 'then': 'Middle', 'weight': 1.0},
+    {'name': 'Rule11', 'if': [('age', 'Old'), ('diabetes', 'Pre')], 'tnorm': 'min', 'then': 'Middle', 'weight': 1.0},
+    {'name': 'Rule12', 'if': [('smoking', 'Light'), ('diabetes', 'Pre')], 'tnorm': 'min', 'then': 'Middle', 'weight': 1.0},
+    {'name': 'Rule13', 'if': [('age', 'Old'), ('smoking', 'Heavy')], 'tnorm': 'min', 'then': 'Sick', 'weight': 1.0},
+    {'name': 'Rule14', 'if': [('age', 'Old'), ('diabetes', 'Yes')], 'tnorm': 'min', 'then': 'Sick', 'weight': 1.0},
+    {'name': 'Rule15', 'if': [('smoking', 'Heavy'), ('diabetes', 'Yes')], 'tnorm': 'min', 'then': 'Sick', 'weight': 1.0},
+]
+
+TNORMS = {'min': np.minimum, 'prod': np.multiply}
+TNORMS_SCALAR = {'min': min, 'prod': lambda values: float(np.prod(values))}
+
+def describe_rule(rule):
+    return ' & '.join(f"{var}={term}" for var, term in rule['if']) + f" -> {rule['then']}"
+
+def compile_rule_table(rules, variables, classes=CLASSES):
+    # variables maps each variable to its terms, in the column order of the membership matrix
+    columns = {}
+    for var, terms in variables.items():
+        for term in terms:
+            columns[(var, term)] = len(columns)
+    n_columns = len(columns)
+    width = max(len(rule['if']) for rule in rules)
+    # Short rules are padded with an all-ones column, the identity of both t-norms
+    index = np.full((len(rules), width), n_columns, dtype=np.intp)
+    for r, rule in enumerate(rules):
+        if rule['tnorm'] not in TNORMS:
+            raise ValueError(f"{rule['name']}: unknown t-norm {rule['tnorm']!r}")
+        if rule['then'] not in classes:
+            raise ValueError(f"{rule['name']}: unknown consequent {rule['then']!r}")
+        for k, antecedent in enumerate(rule['if']):
+            if antecedent not in columns:
+                raise ValueError(f"{rule['name']}: unknown term {antecedent!r}")
+            index[r, k] = columns[antecedent]
+    tnorms = [rule['tnorm'] for rule in rules]
+    consequent = np.array([classes.index(rule['then']) for rule in rules], dtype=np.intp)
+    return {
+        'rules': list(rules),
+        'names': [rule['name'] for rule in rules],
+        'classes': list(classes),
+        'columns': columns,
+        'n_columns': n_columns,
+        'index': index,
+        'tnorm_groups': {t: np.flatnonzero([x == t for x in tnorms]) for t in sorted(set(tnorms))},
+        'consequent': consequent,
+        'weights': np.array([rule.get('weight', 1.0) for rule in rules], dtype=float),
+        'class_rules': {c: np.flatnonzero(consequent == i) for i, c in enumerate(classes)},
+        'scalar_plan': [(rule['if'], TNORMS_SCALAR[rule['tnorm']], rule.get('weight', 1.0)) for rule in rules],
+        # changes whenever the rule definitions do; used to invalidate cached results
+        'fingerprint': repr([(rule['if'], rule['tnorm'], rule['then'], rule.get('weight', 1.0)) for rule in rules]),
+        'variable_rules': {var: np.flatnonzero([any(v == var for v, _ in rule['if']) for rule in rules]) for var in variables},
+        'variables': list(variables),
+        'rule_tnorms': np.array(tnorms),
+    }
+
+def fire_rules(compiled, memberships):
+    # (N, n_columns) membership matrix -> (N, n_rules) firing strengths: one gather and reduce per antecedent slot
+    memberships = np.asarray(memberships, dtype=float)
+    single = memberships.ndim == 1
+    memberships = np.atleast_2d(memberships)
+    padded = np.concatenate([memberships, np.ones((memberships.shape[0], 1))], axis=1)
+    index = compiled['index']
+    strengths = np.empty((memberships.shape[0], index.shape[0]))
+    for tnorm, rule_idx in compiled['tnorm_groups'].items():
+        idx = index[rule_idx]
+        out = padded[:, idx[:, 0]]
+        for k in range(1, idx.shape[1]):
+            TNORMS[tnorm](out, padded[:, idx[:, k]], out=out)
+        strengths[:, rule_idx] = out
+    weights = compiled['weights']
+    if np.any(weights != 1.0):
+        strengths *= weights
+    return strengths[0] if single else strengths
+
+def fire_rules_subset(compiled, memberships, rule_idx):
+    # fire_rules restricted to the rules in rule_idx: (N, n_columns) -> (N, len(rule_idx))
+    memberships = np.atleast_2d(np.asarray(memberships, dtype=float))
+    padded = np.concatenate([memberships, np.ones((memberships.shape[0], 1))], axis=1)
+    idx = compiled['index'][rule_idx]
+    strengths = np.empty((memberships.shape[0], len(rule_idx)))
+    tnorms = compiled['rule_tnorms'][rule_idx]
+    for tnorm in compiled['tnorm_groups']:
+        pos = np.flatnonzero(tnorms == tnorm)
+        if not len(pos):
+            continue
+        out = padded[:, idx[pos, 0]]
+        for k in range(1, idx.shape[1]):
+            TNORMS[tnorm](out, padded[:, idx[pos, k]], out=out)
+        strengths[:, pos] = out
+    return strengths * compiled['weights'][rule_idx]
+
+def fire_rules_scalar(compiled, fuzz, rule_idx=None):
+    # Single patient from per-variable membership dicts, e.g. {'bp': {'Low': ..}, ..}.
+    # With rule_idx only those rules are evaluated and the others are 0.
+    if rule_idx is None:
+        return [tnorm([fuzz[var][term] for var, term in antecedents]) * weight
+                for antecedents, tnorm, weight in compiled['scalar_plan']]
+    strengths = [0.0] * len(compiled['scalar_plan'])
+    for r in rule_idx:
+        antecedents, tnorm, weight = compiled['scalar_plan'][r]
+        strengths[r] = tnorm([fuzz[var][term] for var, term in antecedents]) * weight
+    return strengths
+
+def group_by_class(compiled, strengths):
+    # Split flat rule strengths into the {'Healthy': [...], 'Middle': [...], 'Sick': [...]} layout
+    if isinstance(strengths, list):
+        return {c: [strengths[i] for i in idx] for c, idx in compiled['class_rules'].items()}
+    return {c: strengths[..., idx] for c, idx in compiled['class_rules'].items()}
+
+def compile_support_index(compiled, supports):
+    # supports maps (variable, term) to the open interval (lo, hi) outside which that membership is 0.
+    # The support ends cut each variable's axis into regions. For every region we keep a bitset of the rules
+    # that variable does not rule out there; a patient can only fire the AND of its regions' bitsets.
+    n_rules = len(compiled['rules'])
+    regions = []
+    for var in compiled['variables']:
+        cols = [(col, supports[key]) for key, col in compiled['columns'].items() if key[0] == var]
+        breaks = np.unique([bound for _, support in cols for bound in support])
+        edges = np.concatenate([[-np.inf], breaks, [np.inf]])
+        # Columns of other variables (and the padding column) never rule anything out here
+        live = np.ones((len(breaks) + 1, compiled['n_columns'] + 1), dtype=bool)
+        for col, (lo, hi) in cols:
+            # region r is [edges[r], edges[r + 1]); the term stays where that overlaps (lo, hi)
+            live[:, col] = (edges[:-1] < hi) & (edges[1:] > lo)
+        allowed = live[:, compiled['index']].all(axis=2)  # (n_regions, n_rules)
+        regions.append({'breaks': breaks, 'break_list': breaks.tolist(),
+                        'rule_bits': np.packbits(allowed, axis=1, bitorder='little')})
+    n_regions = [len(r['rule_bits']) for r in regions]
+    if np.prod(n_regions, dtype=float) >= 2 ** 62:
+        raise ValueError("Too many support regions to index")
+    radix = np.cumprod([1] + n_regions[:-1])
+    return {
+        'variables': list(compiled['variables']),
+        'regions': regions,
+        'radix': radix.astype(np.int64),
+        'radix_list': radix.tolist(),
+        'n_rules': n_rules,
+        'cell_rules': {},  # cell id -> rule indices for the scalar path, filled as cells are seen
+    }
+
+def support_regions(index, X):
+    # (N, n_variables) finite raw inputs -> (N, n_variables) region numbers
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    regions = np.empty(X.shape, dtype=np.int64)
+    for v, region in enumerate(index['regions']):
+        regions[:, v] = np.searchsorted(region['breaks'], X[:, v], side='right')
+    return regions
+
+def region_rule_bits(index, regions):
+    # (N, n_variables) region numbers -> (N, n_bytes) packed bitsets of the rules that can fire
+    bits = index['regions'][0]['rule_bits'][regions[:, 0]]
+    for v in range(1, len(index['regions'])):
+        bits &= index['regions'][v]['rule_bits'][regions[:, v]]
+    return bits
+
+def active_rules(compiled, index, x):
+    # Rule indices that can fire for one patient (raw inputs in index['variables'] order); plain Python for speed.
+    # A missing (NaN) input keeps every rule, as the memberships then decide what NaN propagates.
+    if any(value != value for value in x):
+        return np.arange(index['n_rules'])
+    regions = [bisect.bisect_right(region['break_list'], value) for value, region in zip(x, index['regions'])]
+    cell = sum(r * radix for r, radix in zip(regions, index['radix_list']))
+    rules = index['cell_rules'].get(cell)
+    if rules is None:
+        bits = region_rule_bits(index, np.array([regions]))[0]
+        rules = index['cell_rules'][cell] = np.flatnonzero(np.unpackbits(bits, count=index['n_rules'], bitorder='little'))
+    return rules
+
+def fire_rule_pairs(compiled, padded, rows, rules):
+    # Strengths of individual (patient row, rule) pairs from a membership matrix padded with the ones column
+    idx = compiled['index'][rules]
+    strengths = np.empty(len(rows))
+    tnorms = compiled['rule_tnorms'][rules]
+    for tnorm in compiled['tnorm_groups']:
+        pos = np.flatnonzero(tnorms == tnorm) if len(compiled['tnorm_groups']) > 1 else slice(None)
+        out = padded[rows[pos], idx[pos, 0]]
+        for k in range(1, idx.shape[1]):
+            TNORMS[tnorm](out, padded[rows[pos], idx[pos, k]], out=out)
+        strengths[pos] = out
+    return strengths * compiled['weights'][rules]
+
+def fire_rules_indexed(compiled, index, X, memberships, min_group=32, chunk_size=16384):
+    # fire_rules that only evaluates rules able to fire; returns (N, n_rules) strengths and the number of rule
+    # evaluations done. Patients are grouped by their set of live rules and each group of at least min_group
+    # patients fires just its rules column-wise. Patients in smaller groups (large, sparse rule bases give many
+    # distinct sets) fire their live (patient, rule) pairs directly.
+    memberships = np.atleast_2d(np.asarray(memberships, dtype=float))
+    padded = np.concatenate([memberships, np.ones((memberships.shape[0], 1))], axis=1)
+    n_rules = index['n_rules']
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    strengths = np.zeros((memberships.shape[0], n_rules))
+    # Patients with a missing input fire every rule, exactly as fire_rules would
+    missing = np.isnan(X).any(axis=1)
+    evaluated = int(missing.sum()) * n_rules
+    if evaluated:
+        strengths[missing] = fire_rules(compiled, memberships[missing])
+    patients = np.flatnonzero(~missing)
+    regions = support_regions(index, X[patients])
+    cells, first, cell_of_patient = np.unique(regions @ index['radix'], return_index=True, return_inverse=True)
+    bits = np.ascontiguousarray(region_rule_bits(index, regions[first]))
+    # Cells with the same bitset form one group
+    keys = bits.view(np.dtype((np.void, bits.shape[1]))).ravel()
+    _, group_first, group_of_cell = np.unique(keys, return_index=True, return_inverse=True)
+    group_of_patient = group_of_cell.reshape(-1)[cell_of_patient.reshape(-1)]
+    order = np.argsort(group_of_patient, kind='stable')
+    bounds = np.searchsorted(group_of_patient[order], np.arange(len(group_first) + 1))
+    small = []
+    for g, c in enumerate(group_first):
+        rows = order[bounds[g]:bounds[g + 1]]
+        if len(rows) < min_group:
+            small.append(rows)
+            continue
+        rows = patients[rows]
+        rules = np.flatnonzero(np.unpackbits(bits[c], count=n_rules, bitorder='little'))
+        if len(rules):
+            strengths[np.ix_(rows, rules)] = fire_rules_subset(compiled, memberships[rows], rules)
+            evaluated += len(rows) * len(rules)
+    if small:
+        small = np.concatenate(small)
+        patient_bits = bits[group_first][group_of_patient[small]]
+        for start in range(0, len(small), chunk_size):
+            live_rows, rules = np.nonzero(np.unpackbits(patient_bits[start:start + chunk_size], axis=1, count=n_rules,
+                                                        bitorder='little'))
+            rows = patients[small[start:start + chunk_size][live_rows]]
+            strengths[rows, rules] = fire_rule_pairs(compiled, padded, rows, rules)
+            evaluated += len(rows)
+    return strengths, evaluated
+
+# Output sets for true Mamdani inference: triangles (a, b, c) on the CHD universe, one per class
+CHD_OUTPUT_MFS = {'Healthy': (0, 0.75, 1.5), 'Middle': (1, 2, 3), 'Sick': (2.5, 3.25, 4)}
+CHD_UNIVERSE = (0.0, 4.0)
+MAMDANI_METHODS = ['centroid', 'bisector', 'mom']
+IMPLICATIONS = ['clip', 'scale']
+
+def compile_output_grid(output_mfs=CHD_OUTPUT_MFS, universe=CHD_UNIVERSE, resolution=161, classes=CLASSES):
+    # Samples every output set once on an evenly spaced grid; support slices let aggregation skip the zeros.
+    # The default 0.025 step puts every CHD breakpoint on the grid, so mean of maximum is exact and
+    # centroid/bisector stay within 0.01 of the continuous integral.
+    y = np.linspace(universe[0], universe[1], resolution)
+    mfs = np.array([np.interp(y, output_mfs[c], [0.0, 1.0, 0.0]) for c in classes])
+    support = []
+    for mf in mfs:
+        nonzero = np.flatnonzero(mf > 0)
+        support.append(slice(nonzero[0], nonzero[-1] + 1) if len(nonzero) else slice(0, 0))
+    return {
+        'y': y,
+        'step': y[1] - y[0],
+        'mfs': mfs,
+        'support': support,
+        'classes': list(classes),
+        'fingerprint': repr((sorted(output_mfs.items()), universe, resolution)),
+    }
+
+def mamdani_aggregate(grid, strengths, implication='clip'):
+    # (N, n_classes) class strengths -> (N, resolution) output set: clip (min) or scale (product), then max over classes
+    aggregated = np.zeros((strengths.shape[0], len(grid['y'])))
+    for k, sl in enumerate(grid['support']):
+        mf = grid['mfs'][k, sl]
+        if implication == 'clip':
+            implied = np.minimum(strengths[:, k, None], mf)
+        else:
+            implied = strengths[:, k, None] * mf
+        np.maximum(aggregated[:, sl], implied, out=aggregated[:, sl])
+    return aggregated
+
+def defuzzify_output_grid(grid, aggregated, method='centroid'):
+    # Integrates each row of an aggregated output set; rows with an empty set give 0.
+    # Row-wise sums rather than a matrix product, so a row's result does not depend on how the batch was split.
+    y = grid['y']
+    area = aggregated.sum(axis=1)
+    empty = area == 0
+    if method == 'centroid':
+        return np.divide((aggregated * y).sum(axis=1), area, out=np.zeros(len(area)), where=~empty)
+    if method == 'bisector':
+        # Point splitting the area in half, interpolated inside the grid cell where the running sum crosses it
+        cumulative = np.cumsum(aggregated, axis=1)
+        half = area / 2
+        idx = np.argmax(cumulative >= half[:, None], axis=1)
+        rows = np.arange(len(area))
+        cell = aggregated[rows, idx]
+        frac = np.divide(half - (cumulative[rows, idx] - cell), cell, out=np.zeros(len(area)), where=cell > 0)
+        value = np.clip(y[idx] + (frac - 0.5) * grid['step'], y[0], y[-1])
+        return np.where(empty, 0.0, value)
+    # mean of maximum
+    peak = aggregated.max(axis=1)
+    at_peak = aggregated >= peak[:, None]
+    return np.where(empty, 0.0, np.where(at_peak, y, 0.0).sum(axis=1) / at_peak.sum(axis=1))
+
+def mamdani_defuzzify(grid, strengths, method='centroid', implication='clip', chunk_size=1024):
+    # Batched Mamdani output; patients are processed chunk_size at a time so the (chunk, resolution) arrays stay small
+    if method not in MAMDANI_METHODS:
+        raise ValueError(f"Unknown Mamdani defuzzification {method!r}, expected one of {MAMDANI_METHODS}")
+    if implication not in IMPLICATIONS:
+        raise ValueError(f"Unknown implication {implication!r}, expected one of {IMPLICATIONS}")
+    strengths = np.atleast_2d(np.asarray(strengths, dtype=float))
+    out = np.empty(strengths.shape[0])
+    for start in range(0, strengths.shape[0], chunk_size):
+        aggregated = mamdani_aggregate(grid, strengths[start:start + chunk_size], implication)
+        out[start:start + chunk_size] = defuzzify_output_grid(grid, aggregated, method)
+    return out
+
+# Hedges as powers of a rule's firing strength: indeed(mu) = mu ** 2, somewhat(mu) = mu ** 0.5
+HEDGES = {'indeed': 2.0, 'somewhat': 0.5}
+
+def hedge_modifiers(n_rules, hedges=HEDGES, rule_idx=None):
+    # One exponent vector per (rule, hedge): that rule's strength is raised to the hedge power, the others to 1
+    rule_idx = range(n_rules) if rule_idx is None else rule_idx
+    combos = [(r, h) for r in rule_idx for h in hedges]
+    exponents = np.ones((len(combos), n_rules))
+    for k, (r, h) in enumerate(combos):
+        exponents[k, r] = hedges[h]
+    return exponents, combos
+
+def rule_weight_grid(n_rules, rule_idx, values):
+    # Every combination of values for the rules in rule_idx, the other rules keep weight 1: (len(values) ** len(rule_idx), n_rules)
+    combos = list(itertools.product(values, repeat=len(rule_idx)))
+    weights = np.ones((len(combos), n_rules))
+    weights[:, list(rule_idx)] = combos
+    return weights
+
+def sweep_rule_modifiers(compiled, strengths, centers, exponents=None, weights=None, method='singleton', grid=None,
+                         implication='clip', chunk_size=262144):
+    # strengths is the (N, n_rules) output of fire_rules; exponents and weights are (K, n_rules) modifier vectors
+    # giving weight * strength ** exponent. Weights multiply the rule table weights already in strengths.
+    # -> {'sugeno': (K, N), 'mamdani': (K, N)}; the rules fire once and all K variants are scored in batched passes.
+    strengths = np.atleast_2d(np.asarray(strengths, dtype=float))
+    exponents = None if exponents is None else np.atleast_2d(np.asarray(exponents, dtype=float))
+    weights = None if weights is None else np.atleast_2d(np.asarray(weights, dtype=float))
+    modifiers = [m for m in (exponents, weights) if m is not None]
+    if not modifiers:
+        raise ValueError("Pass exponents, weights or both")
+    K = modifiers[0].shape[0]
+    for m in modifiers:
+        if m.shape != (K, strengths.shape[1]):
+            raise ValueError(f"Modifiers must be ({K}, {strengths.shape[1]}), got {m.shape}")
+    if exponents is not None and np.any(exponents <= 0):
+        raise ValueError("Hedge exponents must be positive")  # 0 ** 0 would fire a rule that did not fire
+    if weights is not None and np.any(weights < 0):
+        raise ValueError("Rule weights must be non-negative")
+    if method != 'singleton' and grid is None:
+        raise ValueError(f"Mamdani method {method!r} needs an output grid")
+    centers = np.asarray(centers, dtype=float)
+    rule_centers = centers[compiled['consequent']]
+    class_rules = [compiled['class_rules'][c] for c in compiled['classes']]
+    N = strengths.shape[0]
+    sugeno = np.empty((K, N))
+    mamdani = np.empty((K, N))
+    # Patients per block, so that the (K, block, n_rules) modified strengths stay around chunk_size rows
+    block = max(1, chunk_size // K)
+    for start in range(0, N, block):
+        s = strengths[start:start + block]
+        n = s.shape[0]
+        modified = np.broadcast_to(s, (K,) + s.shape)
+        if exponents is not None:
+            modified = modified ** exponents[:, None, :]
+        if weights is not None:
+            modified = modified * weights[:, None, :]
+        numerator = (modified * rule_centers).sum(axis=2)
+        denominator = modified.sum(axis=2)
+        sugeno[:, start:start + n] = np.divide(numerator, denominator, out=np.zeros((K, n)), where=denominator != 0)
+        classes = np.stack([modified[..., idx].max(axis=2) if len(idx) else np.zeros((K, n)) for idx in class_rules], axis=2)
+        if method == 'singleton':
+            numerator = (classes * centers).sum(axis=2)
+            denominator = classes.sum(axis=2)
+            mamdani[:, start:start + n] = np.divide(numerator, denominator, out=np.zeros((K, n)), where=denominator != 0)
+        else:
+            mamdani[:, start:start + n] = mamdani_defuzzify(grid, classes.reshape(K * n, -1), method, implication).reshape(K, n)
+    return {'sugeno': sugeno, 'mamdani': mamdani}
+
+def hedge_sweep(compiled, strengths, centers, hedges=HEDGES, rule_idx=None, **options):
+    # Every (rule, hedge) pair over the whole cohort -> 'sugeno' and 'mamdani' of shape (n_rules, n_hedges, N)
+    rule_idx = list(range(len(compiled['rules'])) if rule_idx is None else rule_idx)
+    exponents, _ = hedge_modifiers(len(compiled['rules']), hedges, rule_idx)
+    out = sweep_rule_modifiers(compiled, strengths, centers, exponents=exponents, **options)
+    shape = (len(rule_idx), len(hedges), -1)
+    return {'rules': [compiled['names'][r] for r in rule_idx], 'hedges': list(hedges),
+            'sugeno': out['sugeno'].reshape(shape), 'mamdani': out['mamdani'].reshape(shape)}
+
+def weight_sweep(compiled, strengths, centers, weights, **options):
+    # One row of weights per candidate rule base -> 'sugeno' and 'mamdani' of shape (n_candidates, N)
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    out = sweep_rule_modifiers(compiled, strengths, centers, weights=weights, **options)
+    return {'rules': list(compiled['names']), 'weights': weights, 'sugeno': out['sugeno'], 'mamdani': out['mamdani']}
+
+def sweep_errors(sweep, y, output='sugeno'):
+    # Mean squared error against outcomes y for every variant in a sweep, shaped like the sweep without the patient axis
+    return np.mean((sweep[output] - np.asarray(y, dtype=float)) ** 2, axis=-1)
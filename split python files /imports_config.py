@@ -1,4 +1,5 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-import pandas as pd
+from lazy_imports import lazy_import
+# Plotting and data frames load on first use; matplotlib registers the '3d' projection itself (no Axes3D import needed)
+plt = lazy_import('matplotlib.pyplot')
+pd = lazy_import('pandas')
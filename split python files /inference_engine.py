@@ -1,3 +1,19 @@
+from fuzzy_rule_engine import MAMDANI_METHODS, compile_output_grid, mamdani_defuzzify
+
+# 'singleton' (the default) is the weighted average of class centers (defuzzify_mamdani_cog); 'centroid',
+# 'bisector' and 'mom' integrate the clipped or scaled output sets on OUTPUT_GRID, opt in with set_mamdani_method
+MAMDANI_METHOD = 'singleton'
+MAMDANI_IMPLICATION = 'clip'
+OUTPUT_GRID = compile_output_grid()
+
+def set_mamdani_method(method='centroid', implication='clip', resolution=None):
+    global MAMDANI_METHOD, MAMDANI_IMPLICATION, OUTPUT_GRID
+    if method != 'singleton' and method not in MAMDANI_METHODS:
+        raise ValueError(f"Unknown Mamdani defuzzification {method!r}, expected 'singleton' or one of {MAMDANI_METHODS}")
+    MAMDANI_METHOD, MAMDANI_IMPLICATION = method, implication
+    if resolution is not None:
+        OUTPUT_GRID = compile_output_grid(resolution=resolution)
+
 def aggregate_rules_mamdani(rules):
     return {'Healthy': max(rules['Healthy']),'Middle': max(rules['Middle']),'Sick': max(rules['Sick'])}
 
@@ -6,9 +22,22 @@ def defuzzify_mamdani_cog(aggregated):
     denominator = (aggregated['Healthy'] + aggregated['Middle'] + aggregated['Sick'])
 
     if denominator == 0:
+        if PIPELINE_STATS is not None:
+            PIPELINE_STATS.zero_denominator['mamdani'] += 1
         return 0
     return numerator / denominator
 
+def defuzzify_mamdani(aggregated, method=None):
+    method = method or MAMDANI_METHOD
+    if method == 'singleton':
+        return defuzzify_mamdani_cog(aggregated)
+    strengths = [[aggregated[c] for c in OUTPUT_GRID['classes']]]
+    if not any(strengths[0]):
+        if PIPELINE_STATS is not None:
+            PIPELINE_STATS.zero_denominator['mamdani'] += 1
+        return 0
+    return float(mamdani_defuzzify(OUTPUT_GRID, strengths, method, MAMDANI_IMPLICATION)[0])
+
 def defuzzify_sugeno_weighted_average(rules):
     all_rules = []
     all_values = []
@@ -27,8 +56,41 @@ def defuzzify_sugeno_weighted_average(rules):
             all_rules.append(strength)
             all_values.append(SICK_CENTER)
     if not all_rules:
+        if PIPELINE_STATS is not None:
+            PIPELINE_STATS.zero_denominator['sugeno'] += 1
         return 0
     # Weighted average
     numerator = sum(r * v for r, v in zip(all_rules, all_values))
     denominator = sum(all_rules)
     return numerator / denominator
+
+def aggregate_rules_mamdani_batch(rules):
+    return {'Healthy': rules['Healthy'].max(axis=1),'Middle': rules['Middle'].max(axis=1),'Sick': rules['Sick'].max(axis=1)}
+
+def defuzzify_mamdani_cog_batch(aggregated):
+    numerator = (aggregated['Healthy'] * HEALTHY_CENTER + aggregated['Middle'] * MIDDLE_CENTER + aggregated['Sick'] * SICK_CENTER)
+    denominator = (aggregated['Healthy'] + aggregated['Middle'] + aggregated['Sick'])
+    if PIPELINE_STATS is not None:
+        PIPELINE_STATS.zero_denominator['mamdani'] += int(np.count_nonzero(denominator == 0))
+    # Patients with no firing rule get 0, like the scalar version
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+
+def defuzzify_mamdani_batch(aggregated, method=None):
+    method = method or MAMDANI_METHOD
+    if method == 'singleton':
+        return defuzzify_mamdani_cog_batch(aggregated)
+    strengths = np.column_stack([aggregated[c] for c in OUTPUT_GRID['classes']])
+    if PIPELINE_STATS is not None:
+        PIPELINE_STATS.zero_denominator['mamdani'] += int(np.count_nonzero(strengths.sum(axis=1) == 0))
+    return mamdani_defuzzify(OUTPUT_GRID, strengths, method, MAMDANI_IMPLICATION)
+
+def defuzzify_sugeno_weighted_average_batch(rules):
+    # Zero-strength rules add nothing to either sum, so no filtering is needed
+    healthy = rules['Healthy'].sum(axis=1)
+    middle = rules['Middle'].sum(axis=1)
+    sick = rules['Sick'].sum(axis=1)
+    numerator = healthy * HEALTHY_CENTER + middle * MIDDLE_CENTER + sick * SICK_CENTER
+    denominator = healthy + middle + sick
+    if PIPELINE_STATS is not None:
+        PIPELINE_STATS.zero_denominator['sugeno'] += int(np.count_nonzero(denominator == 0))
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
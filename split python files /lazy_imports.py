@@ -0,0 +1,32 @@
+
+import importlib
+import importlib.util
+
+class LazyModule:
+    # Stands in for a module and imports it on first attribute access, so plotting and
+    # data-frame libraries cost nothing for code paths that never touch them
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module {self._name!r} ({state})>"
+
+def lazy_import(name):
+    return LazyModule(name)
+
+def module_available(name):
+    # True when the module can be imported, without importing it
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        return False
@@ -13,19 +13,30 @@ if __name__ == "__main__":
     print("\n" + "=" * 70)
     print("2. MAMDANI vs SUGENO COMPARISON")
     print("=" * 70)
-    print(f"Mamdani (COG): {result['mamdani']:.3f}")
+    for method in ['centroid', 'bisector', 'mom', 'singleton']:
+        value = diagnose_patient_advanced(*test_patient, mamdani_method=method)['mamdani']
+        print(f"Mamdani ({method}): {value:.3f}")
     print(f"Sugeno (Weighted Average): {result['sugeno']:.3f}")
-    print(f"Absolute Difference: {abs(result['mamdani'] - result['sugeno']):.3f}")
+    print(f"Absolute Difference ({MAMDANI_METHOD} vs Sugeno): {abs(result['mamdani'] - result['sugeno']):.3f}")
 
     if abs(result['mamdani'] - result['sugeno']) < 0.1:
         print("→ Both methods give very similar results")
     else:
         print("→ Noticeable difference between methods")
 
+    # Method differences show up over a cohort rather than on the single test patient
+    cohort = np.random.default_rng(0).uniform([90, 100, 50, 20, 0, 70], [210, 300, 150, 90, 2, 300], size=(10000, 6))
+    sugeno_labels = classify_chd(diagnose_patients_batch(cohort)['sugeno'])
+    print(f"\n{'Method':<12} {'Mean':>6} {'Std':>6} {'Label agreement with Sugeno':>29}")
+    for method in ['centroid', 'bisector', 'mom', 'singleton']:
+        scores = diagnose_patients_batch(cohort, mamdani_method=method)['mamdani']
+        agreement = np.mean(classify_chd(scores) == sugeno_labels)
+        print(f"{method:<12} {scores.mean():>6.3f} {scores.std():>6.3f} {agreement:>29.1%}")
+
     print("\n" + "=" * 70)
     print("3. SENSITIVITY ANALYSIS")
     print("=" * 70)
-    print("Running sensitivity analysis (this may take a few seconds)...")
+    print("Running sensitivity analysis (one batched pass)...")
 
     variations, sensitivity_results = sensitivity_analysis(test_patient)
 
@@ -38,6 +49,16 @@ if __name__ == "__main__":
 
     plot_sensitivity_analysis(variations, sensitivity_results) # Plot sensitivity
 
+    print("\n" + "=" * 70)
+    print("4. CONTROL SURFACE")
+    print("=" * 70)
+    surface = control_surface('bp', 'age', resolution=400, base=test_patient)
+    source = "cache" if surface['cached'] else "one batched pass"
+    print(f"BP x Age, {surface['z'].size} grid points from {source}; CHD range {surface['z'].min():.2f} - {surface['z'].max():.2f}")
+    render_control_surface(surface, 'control_surface_bp_age.png')
+    render_control_surface(surface, 'control_surface_bp_age_3d.png', kind='surface')
+    print("Control surface plots saved as 'control_surface_bp_age.png' and 'control_surface_bp_age_3d.png'")
+
     compare_systems()
 
     print("\n" + "=" * 70)
@@ -47,4 +68,5 @@ if __name__ == "__main__":
     print("1. Advanced fuzzy system with 6 input factors")
     print("2. Mamdani vs Sugeno comparison")
     print("3. Sensitivity analysis plot (sensitivity_analysis.png)")
-    print("4. System comparison table")
+    print("4. Control surface plots (control_surface_bp_age*.png)")
+    print("5. System comparison table")
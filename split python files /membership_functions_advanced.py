@@ -20,23 +20,93 @@ def trapezoidal(x, a, b, c, d):
         return (d - x) / (d - c)
     return 0
 
+def triangular_batch(x, a, b, c):
+    # Array version of triangular, same open/closed boundaries
+    x = np.asarray(x, dtype=float)
+    mu = np.zeros(x.shape)
+    rising = (x > a) & (x <= b) & (x < c)
+    falling = (x > b) & (x < c)
+    mu[rising] = (x[rising] - a) / (b - a)
+    mu[falling] = (c - x[falling]) / (c - b)
+    return mu
+
+def trapezoidal_batch(x, a, b, c, d):
+    # Array version of trapezoidal, same open/closed boundaries
+    x = np.asarray(x, dtype=float)
+    mu = np.zeros(x.shape)
+    inside = (x > a) & (x < d)
+    rising = inside & (x <= b)
+    plateau = inside & (x > b) & (x <= c)
+    falling = inside & (x > c)
+    mu[rising] = (x[rising] - a) / (b - a)
+    mu[plateau] = 1.0
+    mu[falling] = (d - x[falling]) / (d - c)
+    return mu
+
+# Linguistic variables: terms in column order and their membership functions
+MEMBERSHIP_PARAMS = {
+    'bp': {'Low': ('triangular', (100, 115, 130)), 'Medium': ('triangular', (120, 145, 170)), 'High': ('triangular', (160, 180, 200))},
+    'chol': {'Low': ('trapezoidal', (100, 120, 180, 200)), 'High': ('trapezoidal', (180, 200, 260, 280))},
+    'hr': {'Slow': ('triangular', (50, 65, 80)), 'Moderate': ('triangular', (70, 85, 100)), 'Fast': ('triangular', (90, 145, 200))},
+    'age': {'Young': ('trapezoidal', (0, 0, 25, 35)), 'Middle': ('trapezoidal', (30, 40, 50, 60)), 'Old': ('trapezoidal', (50, 65, 100, 120))},
+    'smoking': {'None': ('trapezoidal', (-0.2, 0, 0, 0.2)), 'Light': ('triangular', (0, 0.3, 0.7)), 'Heavy': ('trapezoidal', (0.5, 1, 3, 4))},
+    'diabetes': {'No': ('trapezoidal', (0, 0, 90, 110)), 'Pre': ('triangular', (100, 112.5, 125)), 'Yes': ('trapezoidal', (120, 150, 300, 400))},
+}
+VARIABLES = ['bp', 'chol', 'hr', 'age', 'smoking', 'diabetes']  # column order of a patient matrix
+MF_SCALAR = {'triangular': triangular, 'trapezoidal': trapezoidal}
+MF_BATCH = {'triangular': triangular_batch, 'trapezoidal': trapezoidal_batch}
+
+def membership_supports():
+    # (variable, term) -> open interval outside which the membership is 0, for the rule index
+    return {(var, term): (params[0], params[-1]) for var, terms in MEMBERSHIP_PARAMS.items() for term, (_, params) in terms.items()}
+
+MEMBERSHIP_LUT = None  # lookup tables when the LUT backend is on, see membership_lut.py
+
+def fuzzify_variable(variable, x):
+    # Always the exact functions; the LUT only pays off for whole columns
+    return {term: MF_SCALAR[kind](x, *params) for term, (kind, params) in MEMBERSHIP_PARAMS[variable].items()}
+
+def fuzzify_variable_batch(variable, x):
+    # (N,) column -> (N, n_terms) membership matrix, columns in MEMBERSHIP_PARAMS order
+    if MEMBERSHIP_LUT is not None:
+        return lut_lookup_batch(variable, x)
+    return np.column_stack([MF_BATCH[kind](x, *params) for kind, params in MEMBERSHIP_PARAMS[variable].values()])
+
 def fuzzify_age(age):
-    return {'Young': trapezoidal(age, 0, 0, 25, 35),'Middle': trapezoidal(age, 30, 40, 50, 60),'Old': trapezoidal(age, 50, 65, 100, 120)}
+    return fuzzify_variable('age', age)
 
 def fuzzify_smoking(packs_per_day):
-    return {'None': trapezoidal(packs_per_day, -0.2, 0, 0, 0.2),'Light': triangular(packs_per_day, 0, 0.3, 0.7),'Heavy': trapezoidal(packs_per_day, 0.5, 1, 3, 4)}
+    return fuzzify_variable('smoking', packs_per_day)
 
 def fuzzify_diabetes(glucose_level):
-    return {'No': trapezoidal(glucose_level, 0, 0, 90, 110),'Pre': triangular(glucose_level, 100, 112.5, 125),'Yes': trapezoidal(glucose_level, 120, 150, 300, 400)}
+    return fuzzify_variable('diabetes', glucose_level)
 
 def fuzzify_bp(bp):
-    return {'Low': triangular(bp, 100, 115, 130),'Medium': triangular(bp, 120, 145, 170),'High': triangular(bp, 160, 180, 200)}
+    return fuzzify_variable('bp', bp)
 
 def fuzzify_chol(chol):
-    return {'Low': trapezoidal(chol, 100, 120, 180, 200),'High': trapezoidal(chol, 180, 200, 260, 280)}
+    return fuzzify_variable('chol', chol)
 
 def fuzzify_hr(hr):
-    return {'Slow': triangular(hr, 50, 65, 80),'Moderate': triangular(hr, 70, 85, 100),'Fast': triangular(hr, 90, 145, 200)}
+    return fuzzify_variable('hr', hr)
+
+def fuzzify_age_batch(age):
+    return fuzzify_variable_batch('age', age)
+
+def fuzzify_smoking_batch(packs_per_day):
+    return fuzzify_variable_batch('smoking', packs_per_day)
+
+def fuzzify_diabetes_batch(glucose_level):
+    return fuzzify_variable_batch('diabetes', glucose_level)
+
+def fuzzify_bp_batch(bp):
+    return fuzzify_variable_batch('bp', bp)
+
+def fuzzify_chol_batch(chol):
+    return fuzzify_variable_batch('chol', chol)
+
+def fuzzify_hr_batch(hr):
+    return fuzzify_variable_batch('hr', hr)
 
 HEALTHY_CENTER = 0.75
 MIDDLE_CENTER = 2.0
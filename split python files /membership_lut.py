@@ -0,0 +1,120 @@
+import time
+
+def membership_universe(variable):
+    # Smallest interval outside of which every term of the variable is 0
+    vertices = [params for _, params in MEMBERSHIP_PARAMS[variable].values()]
+    return min(v[0] for v in vertices), max(v[-1] for v in vertices)
+
+def build_membership_lut(resolution=4096, interpolate=True):
+    # Sample every exact membership function on `resolution` evenly spaced points of its universe. Between two
+    # table points the functions are linear unless a vertex lies in between, so the cells around every vertex
+    # are flagged and looked up with the exact functions instead: supports, plateaus and steps stay exact.
+    tables = {}
+    for var, terms in MEMBERSHIP_PARAMS.items():
+        lo, hi = membership_universe(var)
+        grid = np.linspace(lo, hi, resolution)
+        step = (hi - lo) / (resolution - 1)
+        table = np.column_stack([MF_BATCH[kind](grid, *params) for kind, params in terms.values()])
+        vertices = np.unique([v for _, params in terms.values() for v in params])
+        cells = np.floor((vertices - lo) / step).astype(np.intp)
+        exact_cells = np.zeros(resolution, dtype=bool)
+        for offset in (-1, 0, 1):  # neighbours too, so rounding of a position never picks an unflagged cell
+            exact_cells[np.clip(cells + offset, 0, resolution - 1)] = True
+        tables[var] = {'lo': lo, 'hi': hi, 'step': step, 'table': table, 'exact_cells': exact_cells, 'terms': dict(terms)}
+    return {'resolution': resolution, 'interpolate': interpolate, 'tables': tables}
+
+def enable_membership_lut(resolution=4096, interpolate=True):
+    # Switch fuzzify_*_batch to table lookups; rebuild after changing MEMBERSHIP_PARAMS. The scalar fuzzify_*
+    # keep the exact functions: for one value a table read in Python costs as much as the three exact calls.
+    global MEMBERSHIP_LUT
+    MEMBERSHIP_LUT = build_membership_lut(resolution, interpolate)
+    return MEMBERSHIP_LUT
+
+def disable_membership_lut():
+    global MEMBERSHIP_LUT
+    MEMBERSHIP_LUT = None
+
+def lut_supports():
+    # (variable, term) -> open interval outside which the LUT gives 0: the exact supports of the parameters
+    # the tables were built from, since the cells at support edges are evaluated exactly
+    return {(var, term): (params[0], params[-1]) for var, lut in MEMBERSHIP_LUT['tables'].items()
+            for term, (_, params) in lut['terms'].items()}
+
+def lut_lookup_batch(variable, x):
+    lut = MEMBERSHIP_LUT['tables'][variable]
+    table = lut['table']
+    x = np.asarray(x, dtype=float)
+    # Outside the universe (and for NaN) every term is 0
+    inside = (x > lut['lo']) & (x < lut['hi'])
+    pos = np.where(inside, (x - lut['lo']) / lut['step'], 0.0)
+    i = np.minimum(pos.astype(np.intp), len(table) - 2)
+    if MEMBERSHIP_LUT['interpolate']:
+        left = table[i]
+        mu = left + (table[i + 1] - left) * (pos - i)[:, None]  # exactly 0 or 1 where both ends are
+    else:
+        mu = table[np.floor(pos + 0.5).astype(np.intp)]  # round half up
+    mu[~inside] = 0.0
+    exact = inside & lut['exact_cells'][i]
+    if exact.any():
+        mu[exact] = np.column_stack([MF_BATCH[kind](x[exact], *params) for kind, params in lut['terms'].values()])
+    return mu
+
+def lut_test_patients(n=20000, seed=0):
+    # Random patients plus, for every variable, rows sitting on each of its vertices and one table step either side
+    rng = np.random.default_rng(seed)
+    X = rng.uniform([90, 100, 50, 20, 0, 70], [210, 300, 150, 90, 2, 300], size=(n, 6))
+    rows = [X]
+    for col, (var, lut) in enumerate(MEMBERSHIP_LUT['tables'].items()):
+        vertices = np.unique([v for _, params in lut['terms'].values() for v in params])
+        for offset in (-lut['step'], 0.0, lut['step']):
+            block = X[rng.integers(n, size=len(vertices))].copy()
+            block[:, col] = vertices + offset
+            rows.append(block)
+    return np.concatenate(rows)
+
+def membership_lut_error(samples=200001, patients=20000):
+    # Max |LUT - exact| per variable on a dense grid plus every vertex, with the bound for the current table:
+    # interpolating a linear cell is exact up to rounding, nearest lookup is off by at most half a step of the
+    # steepest slope. 'output' holds the largest Mamdani and Sugeno change over lut_test_patients.
+    global MEMBERSHIP_LUT
+    report = {}
+    for var, lut in MEMBERSHIP_LUT['tables'].items():
+        vertices = [v for _, params in lut['terms'].values() for v in params]
+        x = np.concatenate([np.linspace(lut['lo'], lut['hi'], samples), vertices])
+        exact = np.column_stack([MF_BATCH[kind](x, *params) for kind, params in lut['terms'].values()])
+        error = np.abs(lut_lookup_batch(var, x) - exact)
+        slopes = [1 / (q - p) for _, params in lut['terms'].values() for p, q in zip(params, params[1:]) if q > p]
+        bound = 0.0 if MEMBERSHIP_LUT['interpolate'] else max(slopes) * lut['step'] * 0.5
+        worst = np.unravel_index(np.argmax(error), error.shape)
+        report[var] = {'max_error': float(error.max()), 'at': float(x[worst[0]]), 'bound': bound}
+    X = lut_test_patients(patients)
+    lut = MEMBERSHIP_LUT
+    MEMBERSHIP_LUT = None
+    try:
+        expected = diagnose_patients_batch(X)
+    finally:
+        MEMBERSHIP_LUT = lut
+    actual = diagnose_patients_batch(X)
+    report['output'] = {key: float(np.max(np.abs(actual[key] - expected[key]))) for key in ('mamdani', 'sugeno')}
+    return report
+
+def benchmark_membership_lut(n=1000000, resolution=4096, interpolate=True):
+    # Batch fuzzification only: the scalar path always uses the exact functions
+    rng = np.random.default_rng(0)
+    X = rng.uniform([90, 100, 50, 20, 0, 70], [210, 300, 150, 90, 2, 300], size=(n, 6))
+    timings = {}
+    for backend in ('exact', 'lut'):
+        if backend == 'lut':
+            enable_membership_lut(resolution, interpolate)
+        start = time.perf_counter()
+        fuzzify_patients_batch(X)
+        timings[backend] = time.perf_counter() - start
+    report = membership_lut_error()
+    disable_membership_lut()
+    print(f"\nBatch fuzzification of {n} patients, resolution={resolution}, interpolate={interpolate}")
+    print(f"  exact {timings['exact']:.3f}s  LUT {timings['lut']:.3f}s  speedup {timings['exact'] / timings['lut']:.2f}x")
+    for var in VARIABLES:
+        r = report[var]
+        print(f"  {var:<9} max error {r['max_error']:.2e} at {r['at']:.4g} (bound {r['bound']:.2e})")
+    print(f"  output    max change mamdani {report['output']['mamdani']:.2e}, sugeno {report['output']['sugeno']:.2e}")
+    return timings, report
@@ -0,0 +1,27 @@
+
+import os
+
+# The split files are notebook cells: they share one namespace and are run in this order
+HERE = os.path.dirname(os.path.abspath(__file__))
+ADVANCED_CELLS = ['imports_config.py', 'pipeline_stats.py', 'membership_functions_advanced.py', 'membership_lut.py', 'advanced_rules.py', 'inference_engine.py',
+                  'diagnosis_advanced.py', 'diagnosis_results.py', 'diagnosis_cache.py', 'patient_session.py']
+
+def load_cells(cells, directory=HERE, namespace=None):
+    # Execute cells in order into one namespace, as the notebook does, and return it
+    if namespace is None:
+        namespace = {'__name__': 'notebook_cells'}
+    for cell in cells:
+        path = os.path.join(directory, cell)
+        namespace['__file__'] = path  # cells that locate their own folder read it from here
+        with open(path) as f:
+            exec(compile(f.read(), path, 'exec'), namespace)
+    return namespace
+
+def load_advanced_system(extra_cells=()):
+    return load_cells(ADVANCED_CELLS + list(extra_cells))
+
+NEURO_FUZZY_DIR = os.path.join(HERE, 'NEURO FUZZY SYSTEM ')
+NEURO_FUZZY_CELLS = ['import libraries', 'synthetic_data_generator.py', 'nn_model.py', 'main_nn_model.py', 'model_artifacts.py']
+
+def load_neuro_fuzzy_system(extra_cells=()):
+    return load_cells(NEURO_FUZZY_CELLS + list(extra_cells), NEURO_FUZZY_DIR)
@@ -0,0 +1,69 @@
+
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+import numpy as np
+
+# Work handed to forked workers; children inherit it, so only item indices and results are pickled
+_FORK_TASK = None
+_FORK_ITEMS = None
+
+def _run_forked(i):
+    return _FORK_TASK(_FORK_ITEMS[i])
+
+def fork_map(func, items, n_workers=None):
+    # map(func, items) over a pool of forked processes, results in item order.
+    # func can be a notebook-level function or closure since it is never pickled.
+    global _FORK_TASK, _FORK_ITEMS
+    items = list(items)
+    n_workers = min(n_workers or os.cpu_count() or 1, len(items))
+    if n_workers <= 1 or 'fork' not in mp.get_all_start_methods():
+        return [func(item) for item in items]
+    _FORK_TASK, _FORK_ITEMS = func, items
+    try:
+        with mp.get_context('fork').Pool(n_workers) as pool:
+            return pool.map(_run_forked, range(len(items)))
+    finally:
+        _FORK_TASK, _FORK_ITEMS = None, None
+
+def _score_row_range(func, X, out, start, stop):
+    out[start:stop] = func(X[start:stop])
+
+def shared_row_map(func, X, n_workers=None, out_tail=(), out_dtype=np.float64):
+    # func(X[start:stop]) over contiguous row ranges in forked processes. X is copied once into shared
+    # memory and each worker writes its rows into a shared output array, so no rows or results are pickled.
+    # func must map an (n, ...) block to an (n, *out_tail) array and treat rows independently.
+    X = np.asarray(X)
+    n = X.shape[0]
+    n_workers = min(n_workers or os.cpu_count() or 1, max(n, 1))
+    if n_workers <= 1 or 'fork' not in mp.get_all_start_methods():
+        return np.asarray(func(X), dtype=out_dtype)
+    out_shape = (n,) + tuple(out_tail)
+    in_shm = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+    out_shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(out_shape)) * np.dtype(out_dtype).itemsize, 1))
+    try:
+        X_shared = np.ndarray(X.shape, dtype=X.dtype, buffer=in_shm.buf)
+        X_shared[...] = X
+        out = np.ndarray(out_shape, dtype=out_dtype, buffer=out_shm.buf)
+        bounds = np.linspace(0, n, n_workers + 1).astype(int)
+        ctx = mp.get_context('fork')
+        workers = [ctx.Process(target=_score_row_range, args=(func, X_shared, out, start, stop))
+                   for start, stop in zip(bounds[:-1], bounds[1:])]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        failed = [w.exitcode for w in workers if w.exitcode != 0]
+        if failed:
+            raise RuntimeError(f"{len(failed)} of {n_workers} scoring workers failed (exit codes {failed})")
+        result = out.copy()
+        # Views on the shared buffers must go before the segments can be closed
+        del X_shared, out
+    finally:
+        for shm in (in_shm, out_shm):
+            try:
+                shm.close()
+            except BufferError:
+                pass
+            shm.unlink()
+    return result
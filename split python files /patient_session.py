@@ -0,0 +1,109 @@
+import time
+
+class PatientSession:
+    # One monitored patient: inputs, memberships and rule strengths are kept between calls, and update()
+    # recomputes only the memberships, rules and class aggregates that a changed input feeds
+    # (ADVANCED_RULES['variable_rules'], e.g. HR -> rules 1-6). Results match diagnose_patient_advanced.
+    def __init__(self, bp, chol, hr, age, smoking, diabetes, mamdani_method=None):
+        self.mamdani_method = mamdani_method
+        self.inputs = dict(zip(VARIABLES, (bp, chol, hr, age, smoking, diabetes)))
+        self.refresh()
+
+    def refresh(self):
+        # Full recompute, also used when the configuration has changed since the last one
+        self.config = diagnosis_config_fingerprint()
+        self.compiled = ADVANCED_RULES
+        self.rule_class = [self.compiled['classes'][k] for k in self.compiled['consequent']]
+        self.fuzz = {var: fuzzify_variable(var, x) for var, x in self.inputs.items()}
+        self.strengths = fire_rules_scalar(self.compiled, self.fuzz)
+        self.rules = group_by_class(self.compiled, self.strengths)
+        self.aggregated = aggregate_rules_mamdani(self.rules)
+        self.mamdani = defuzzify_mamdani(self.aggregated, self.mamdani_method)
+        self.sugeno = defuzzify_sugeno_weighted_average(self.rules)
+        self.rules_updated = len(self.strengths)
+        return self.result()
+
+    def update(self, **changes):
+        # e.g. session.update(hr=92); unchanged inputs and inputs whose memberships do not move cost one fuzzification
+        # Rules, membership params, LUT and Mamdani settings, as for the diagnosis cache
+        if diagnosis_config_fingerprint() != self.config:
+            self.inputs.update(self.check(changes))
+            return self.refresh()
+        affected = set()
+        for var, x in self.check(changes).items():
+            if x == self.inputs[var]:
+                continue
+            self.inputs[var] = x
+            fuzz = fuzzify_variable(var, x)
+            if fuzz != self.fuzz[var]:
+                self.fuzz[var] = fuzz
+                affected.update(self.compiled['variable_rules'][var].tolist())
+        self.rules_updated = len(affected)
+        if not affected:
+            return self.result()
+        plan = self.compiled['scalar_plan']
+        classes = set()
+        for r in affected:
+            antecedents, tnorm, weight = plan[r]
+            strength = tnorm([self.fuzz[var][term] for var, term in antecedents]) * weight
+            if strength != self.strengths[r]:
+                self.strengths[r] = strength
+                classes.add(self.rule_class[r])
+        if not classes:
+            return self.result()
+        for c in classes:
+            self.rules[c] = [self.strengths[i] for i in self.compiled['class_rules'][c]]
+        aggregated = aggregate_rules_mamdani(self.rules)
+        # Mamdani depends only on the class maxima
+        if aggregated != self.aggregated:
+            self.aggregated = aggregated
+            self.mamdani = defuzzify_mamdani(aggregated, self.mamdani_method)
+        self.sugeno = defuzzify_sugeno_weighted_average(self.rules)
+        return self.result()
+
+    def check(self, changes):
+        unknown = [var for var in changes if var not in self.inputs]
+        if unknown:
+            raise ValueError(f"Unknown inputs {unknown}, expected some of {VARIABLES}")
+        return changes
+
+    def result(self):
+        # Same layout as diagnose_patient_advanced; lists are copied so callers cannot change the session
+        return {'mamdani': self.mamdani, 'sugeno': self.sugeno, 'rules': {c: list(v) for c, v in self.rules.items()},
+                'aggregated': dict(self.aggregated)}
+
+def benchmark_patient_sessions(n_patients=1000, n_updates=20000, seed=0):
+    # A stream of single-vital updates spread over many patients: incremental update vs full rescore
+    rng = np.random.default_rng(seed)
+    low, high = [90, 100, 50, 20, 0, 70], [210, 300, 150, 90, 2, 300]
+    patients = rng.uniform(low, high, size=(n_patients, 6)).round(1)
+    who = rng.integers(n_patients, size=n_updates)
+    which = rng.integers(6, size=n_updates)
+    # Vitals drift: each reading moves the old value by up to 5% of its range
+    steps = rng.uniform(-0.05, 0.05, size=n_updates) * (np.array(high) - np.array(low))[which]
+
+    sessions = [PatientSession(*row) for row in patients.tolist()]
+    current = patients.copy()
+    updates = []
+    for p, v, step in zip(who.tolist(), which.tolist(), steps.tolist()):
+        current[p, v] = round(min(max(current[p, v] + step, low[v]), high[v]), 1)
+        updates.append((p, VARIABLES[v], current[p, v]))
+
+    start = time.perf_counter()
+    incremental = [sessions[p].update(**{var: x}) for p, var, x in updates]
+    t_incremental = time.perf_counter() - start
+
+    current = patients.copy()
+    start = time.perf_counter()
+    full = []
+    for p, var, x in updates:
+        current[p, VARIABLES.index(var)] = x
+        full.append(diagnose_patient_advanced(*current[p].tolist(), use_cache=False))
+    t_full = time.perf_counter() - start
+
+    mismatches = sum(a['mamdani'] != b['mamdani'] or a['sugeno'] != b['sugeno'] or a['rules'] != b['rules']
+                     for a, b in zip(incremental, full))
+    print(f"\n{n_updates} single-vital updates over {n_patients} patients")
+    print(f"  full rescore {t_full / n_updates * 1e6:.1f} us/update, incremental {t_incremental / n_updates * 1e6:.1f} us/update, "
+          f"speedup {t_full / t_incremental:.2f}x, mismatches {mismatches}")
+    return {'full_s': t_full, 'incremental_s': t_incremental, 'mismatches': mismatches}
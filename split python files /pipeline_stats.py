@@ -0,0 +1,75 @@
+import time
+from collections import defaultdict
+
+PIPELINE_STATS = None  # PipelineStats when instrumentation is on; the pipeline only checks `is not None` otherwise
+
+class PipelineStats:
+    # Wall time per stage, call counts, firing-rule distribution and zero-denominator fallbacks
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.stage_seconds = defaultdict(float)
+        self.stage_calls = defaultdict(int)
+        self.calls = defaultdict(int)  # 'scalar' calls / 'batch' calls / 'batch_patients'
+        self.firing_rules = defaultdict(int)  # number of non-zero rules -> patients
+        self.zero_denominator = defaultdict(int)  # defuzzifier -> fallbacks to 0
+        self.rules_evaluated = 0  # with the rule index on: rule evaluations done / possible
+        self.rules_possible = 0
+
+    def record_stage(self, stage, seconds):
+        self.stage_seconds[stage] += seconds
+        self.stage_calls[stage] += 1
+
+    def record_firing(self, counts):
+        # counts: non-zero rule count of one patient, or an array with one entry per patient
+        if np.ndim(counts) == 0:
+            self.firing_rules[int(counts)] += 1
+            return
+        for n, patients in enumerate(np.bincount(counts)):
+            if patients:
+                self.firing_rules[n] += int(patients)
+
+    def snapshot(self):
+        patients = sum(self.firing_rules.values())
+        return {
+            'calls': dict(self.calls),
+            'stage_seconds': dict(self.stage_seconds),
+            'stage_calls': dict(self.stage_calls),
+            'firing_rules': dict(sorted(self.firing_rules.items())),
+            'mean_firing_rules': sum(n * p for n, p in self.firing_rules.items()) / patients if patients else 0.0,
+            'zero_denominator': dict(self.zero_denominator),
+            'evaluated_rule_fraction': self.rules_evaluated / self.rules_possible if self.rules_possible else 1.0,
+        }
+
+    def to_prometheus(self, prefix='chd_pipeline'):
+        # Prometheus text exposition format
+        lines = [f"# HELP {prefix}_calls_total Diagnosis calls by path.", f"# TYPE {prefix}_calls_total counter"]
+        lines += [f'{prefix}_calls_total{{path="{path}"}} {n}' for path, n in sorted(self.calls.items())]
+        lines += [f"# HELP {prefix}_stage_seconds_total Wall time spent per pipeline stage.", f"# TYPE {prefix}_stage_seconds_total counter"]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{stage}"}} {s:.9f}' for stage, s in sorted(self.stage_seconds.items())]
+        lines += [f"# HELP {prefix}_zero_denominator_total Defuzzifications that fell back to 0 because no rule fired.",
+                  f"# TYPE {prefix}_zero_denominator_total counter"]
+        lines += [f'{prefix}_zero_denominator_total{{defuzzifier="{d}"}} {n}' for d, n in sorted(self.zero_denominator.items())]
+        lines += [f"# HELP {prefix}_rules_evaluated_total Rule evaluations done with the rule index on, of rules_possible_total.",
+                  f"# TYPE {prefix}_rules_evaluated_total counter", f"{prefix}_rules_evaluated_total {self.rules_evaluated}",
+                  f"# TYPE {prefix}_rules_possible_total counter", f"{prefix}_rules_possible_total {self.rules_possible}"]
+        lines += [f"# HELP {prefix}_firing_rules Non-zero rules per diagnosed patient.", f"# TYPE {prefix}_firing_rules histogram"]
+        cumulative = 0
+        n_rules = len(ADVANCED_RULES['names'])
+        for n in range(n_rules + 1):
+            cumulative += self.firing_rules.get(n, 0)
+            lines.append(f'{prefix}_firing_rules_bucket{{le="{n}"}} {cumulative}')
+        lines.append(f'{prefix}_firing_rules_bucket{{le="+Inf"}} {sum(self.firing_rules.values())}')
+        lines.append(f"{prefix}_firing_rules_sum {sum(n * p for n, p in self.firing_rules.items())}")
+        lines.append(f"{prefix}_firing_rules_count {sum(self.firing_rules.values())}")
+        return "\n".join(lines) + "\n"
+
+def enable_pipeline_stats():
+    global PIPELINE_STATS
+    PIPELINE_STATS = PipelineStats()
+    return PIPELINE_STATS
+
+def disable_pipeline_stats():
+    global PIPELINE_STATS
+    PIPELINE_STATS = None
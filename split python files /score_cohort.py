@@ -0,0 +1,120 @@
+
+import argparse
+import os
+import sys
+import numpy as np
+from notebook_cells import load_advanced_system
+from parallel_utils import shared_row_map
+
+INPUT_COLUMNS = ['bp', 'chol', 'hr', 'age', 'smoking', 'diabetes']
+
+def parse_column_map(pairs):
+    # ['bp=SysBP', ...] -> {'bp': 'SysBP', ...}; unmapped inputs keep their own name
+    mapping = {col: col for col in INPUT_COLUMNS}
+    for pair in pairs or []:
+        name, _, source = pair.partition('=')
+        if name not in mapping or not source:
+            raise ValueError(f"Bad column mapping {pair!r}, expected one of {INPUT_COLUMNS} as name=column")
+        mapping[name] = source
+    return mapping
+
+def detect_format(path, fmt):
+    if fmt:
+        return fmt
+    return 'parquet' if path.lower().endswith(('.parquet', '.pq')) else 'csv'
+
+def read_chunks(path, fmt, columns, chunk_size):
+    # Yields pandas DataFrames of at most chunk_size rows; only the needed columns are read
+    if fmt == 'csv':
+        import pandas as pd
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+    else:
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+
+class ChunkWriter:
+    # Appends scored chunks to the output file as they are produced
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self.writer = None
+        self.rows = 0
+
+    def write(self, frame):
+        if self.fmt == 'csv':
+            frame.to_csv(self.path, mode='w' if self.rows == 0 else 'a', header=self.rows == 0, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table)
+        self.rows += len(frame)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+def both_scores(system, X):
+    # Mamdani and Sugeno as the two columns of one array, so workers can write them into a shared output
+    result = system['diagnose_patients_batch'](X)
+    return np.column_stack([result['mamdani'], result['sugeno']])
+
+def score_chunk(system, frame, mapping, keep, n_workers=1):
+    X = frame[[mapping[col] for col in INPUT_COLUMNS]].to_numpy(dtype=float)
+    scores = shared_row_map(lambda block: both_scores(system, block), X, n_workers, out_tail=(2,))
+    result = {'mamdani': scores[:, 0], 'sugeno': scores[:, 1]}
+    out = frame[keep].copy()
+    # Rows with a missing vital are not scored
+    valid = np.isfinite(X).all(axis=1)
+    for name in ('mamdani', 'sugeno'):
+        out[name] = np.where(valid, result[name], np.nan)
+        out[name + '_label'] = np.where(valid, system['classify_chd'](result[name]), '')
+    return out
+
+def score_file(input_path, output_path, mapping=None, keep=(), chunk_size=100000, input_format=None, output_format=None, verbose=True,
+               n_workers=1):
+    system = load_advanced_system()
+    mapping = mapping or parse_column_map([])
+    keep = list(keep)
+    columns = list(dict.fromkeys(keep + [mapping[col] for col in INPUT_COLUMNS]))
+    writer = ChunkWriter(output_path, detect_format(output_path, output_format))
+    try:
+        for chunk in read_chunks(input_path, detect_format(input_path, input_format), columns, chunk_size):
+            writer.write(score_chunk(system, chunk, mapping, keep, n_workers))
+            if verbose:
+                print(f"scored {writer.rows} rows", file=sys.stderr)
+    finally:
+        writer.close()
+    return writer.rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CHD patient file chunk by chunk with the advanced fuzzy system.")
+    parser.add_argument('input', help="CSV or Parquet file with one patient per row")
+    parser.add_argument('output', help="CSV or Parquet file for the scores")
+    parser.add_argument('--column', action='append', metavar='NAME=COLUMN', help=f"map an input ({', '.join(INPUT_COLUMNS)}) to a file column; repeatable")
+    parser.add_argument('--keep', action='append', default=[], metavar='COLUMN', help="copy an input column (e.g. a patient id) to the output; repeatable")
+    parser.add_argument('--chunk-size', type=int, default=100000, help="rows per chunk (default: 100000)")
+    parser.add_argument('--input-format', choices=['csv', 'parquet'], help="default: from the file extension")
+    parser.add_argument('--output-format', choices=['csv', 'parquet'], help="default: from the file extension")
+    parser.add_argument('--workers', type=int, default=1, help="processes scoring each chunk (default: 1)")
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args(argv)
+    if args.chunk_size <= 0:
+        parser.error("--chunk-size must be positive")
+    if args.workers <= 0:
+        parser.error("--workers must be positive")
+    try:
+        mapping = parse_column_map(args.column)
+    except ValueError as e:
+        parser.error(str(e))
+    if os.path.abspath(args.input) == os.path.abspath(args.output):
+        parser.error("input and output must be different files")
+    rows = score_file(args.input, args.output, mapping, args.keep, args.chunk_size, args.input_format, args.output_format,
+                      verbose=not args.quiet, n_workers=args.workers)
+    print(f"Wrote {rows} scored rows to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import chd_core
+
+MAX_BODY_BYTES = 65536
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           431: 'Request Header Fields Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+class Overloaded(Exception):
+    pass
+
+class Histogram:
+    # Cumulative-bucket histogram in the Prometheus layout
+    def __init__(self, buckets):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, value):
+        self.counts[np.searchsorted(self.buckets, value)] += 1
+        self.total += value
+        self.n += 1
+
+    def lines(self, name):
+        cumulative = 0
+        out = []
+        for bound, count in zip(self.buckets + ['+Inf'], self.counts):
+            cumulative += count
+            out.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        return out + [f"{name}_sum {self.total:.9f}", f"{name}_count {self.n}"]
+
+class MicroBatcher:
+    # Collects concurrent single-patient requests into batches of at most max_batch_size,
+    # waiting at most max_wait_ms after the first one, and scores each batch in one vectorized call
+    def __init__(self, score_batch, max_batch_size=256, max_wait_ms=5.0, max_queue=4096):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue(max_queue)
+        # One scoring thread keeps the event loop accepting requests while a batch is computed
+        self.executor = ThreadPoolExecutor(1)
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queue_wait = Histogram(LATENCY_BUCKETS)
+        self.counters = {'requests': 0, 'rejected': 0, 'errors': 0, 'batches': 0}
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown()
+
+    async def submit(self, row):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((row, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.counters['rejected'] += 1
+            raise Overloaded()
+        self.counters['requests'] += 1
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                # Drain what is already queued, then wait for more until the deadline
+                try:
+                    batch.append(self.queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                self.queue_wait.observe(started - enqueued)
+            X = np.array([row for row, _, _ in batch], dtype=float)
+            try:
+                results = await loop.run_in_executor(self.executor, self.score_batch, X)
+            except Exception as e:
+                self.counters['errors'] += len(batch)
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.counters['batches'] += 1
+            self.batch_sizes.observe(len(batch))
+            done = time.perf_counter()
+            for (_, future, enqueued), result in zip(batch, results):
+                self.latency.observe(done - enqueued)
+                if not future.done():  # the client may have gone away
+                    future.set_result(result)
+
+    def metrics(self, prefix='chd_service'):
+        lines = []
+        for name, value in self.counters.items():
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"]
+        lines += [f"# TYPE {prefix}_queue_depth gauge", f"{prefix}_queue_depth {self.queue.qsize()}"]
+        for name, hist in (('batch_size', self.batch_sizes), ('request_latency_seconds', self.latency),
+                           ('queue_wait_seconds', self.queue_wait)):
+            lines += [f"# TYPE {prefix}_{name} histogram"] + hist.lines(f"{prefix}_{name}")
+        return "\n".join(lines) + "\n"
+
+def make_scorer(neuro_fuzzy=None, mamdani_method=None):
+    # (N, 6) -> list of per-patient result dicts
+    def score_batch(X):
+        result = chd_core.diagnose_patients_batch(X, mamdani_method=mamdani_method)
+        labels = chd_core.classify_chd(result['sugeno'])
+        nf = neuro_fuzzy.predict(X) if neuro_fuzzy is not None else None
+        out = []
+        for i in range(len(X)):
+            r = {'mamdani': float(result['mamdani'][i]), 'sugeno': float(result['sugeno'][i]), 'label': str(labels[i])}
+            if nf is not None:
+                r['neuro_fuzzy'] = float(nf[i])
+            out.append(r)
+        return out
+    return score_batch
+
+def train_neuro_fuzzy_model(n_samples=5000, epochs=20, seed=42):
+    system = chd_core.neuro_fuzzy_system()
+    model = chd_core.neuro_fuzzy_model()
+    data = system['generate_training_data'](n_samples, seed)
+    model.train_neuro_fuzzy(data[:, :6], data[:, 6], epochs=epochs, seed=seed, verbose=False)
+    return model
+
+def parse_patient(payload):
+    # {"bp": .., "chol": .., ...} or a list of six numbers in VARIABLES order
+    if isinstance(payload, dict) and 'patient' in payload:
+        payload = payload['patient']
+    if isinstance(payload, dict):
+        missing = [var for var in chd_core.VARIABLES if var not in payload]
+        if missing:
+            raise ValueError(f"missing inputs: {', '.join(missing)}")
+        payload = [payload[var] for var in chd_core.VARIABLES]
+    if not isinstance(payload, list) or len(payload) != len(chd_core.VARIABLES):
+        raise ValueError(f"expected an object with {chd_core.VARIABLES} or a list of {len(chd_core.VARIABLES)} numbers")
+    if not all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in payload):
+        raise ValueError("inputs must be numbers")
+    row = [float(x) for x in payload]
+    if not np.all(np.isfinite(row)):
+        raise ValueError("inputs must be finite numbers")
+    return row
+
+class ScoringService:
+    def __init__(self, batcher):
+        self.batcher = batcher
+
+    async def handle(self, method, path, body):
+        # -> (status, content type, body bytes)
+        if path == '/score':
+            if method != 'POST':
+                return 405, 'application/json', b'{"error": "use POST"}'
+            try:
+                row = parse_patient(json.loads(body or b'null'))
+            except (ValueError, TypeError) as e:
+                return 400, 'application/json', json.dumps({'error': str(e)}).encode()
+            try:
+                result = await self.batcher.submit(row)
+            except Overloaded:
+                return 503, 'application/json', b'{"error": "overloaded, retry later"}'
+            except Exception as e:
+                return 500, 'application/json', json.dumps({'error': str(e)}).encode()
+            return 200, 'application/json', json.dumps(result).encode()
+        if path == '/metrics':
+            return 200, 'text/plain; version=0.0.4', self.batcher.metrics().encode()
+        if path == '/health':
+            return 200, 'application/json', b'{"status": "ok"}'
+        return 404, 'application/json', b'{"error": "not found"}'
+
+    async def read_head(self, reader):
+        # -> (method, path, version, headers), or None when the client closed the connection or sent no valid
+        # request line. A line longer than the reader's limit raises ValueError from readline.
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, path, version = request_line.decode('latin-1').split()
+        except ValueError:
+            return None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return method, path, version, headers
+
+    async def respond(self, writer, status, content_type, body, keep_alive):
+        head = [f"HTTP/1.1 {status} {REASONS[status]}", f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if status == 503:
+            head.append("Retry-After: 1")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+
+    async def serve_connection(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive: request line, headers, Content-Length body
+        try:
+            while True:
+                try:
+                    head = await self.read_head(reader)
+                except (ValueError, asyncio.LimitOverrunError):
+                    await self.respond(writer, 431, 'application/json', b'{"error": "request line or header too long"}', False)
+                    break
+                if head is None:
+                    break
+                method, path, version, headers = head
+                length = headers.get('content-length', '') or '0'
+                if not (length.isascii() and length.isdigit()):
+                    status, content_type, body = 400, 'application/json', b'{"error": "invalid content-length"}'
+                    keep_alive = False
+                elif int(length) > MAX_BODY_BYTES:
+                    status, content_type, body = 413, 'application/json', b'{"error": "body too large"}'
+                    keep_alive = False
+                else:
+                    length = int(length)
+                    body = await reader.readexactly(length) if length else b''
+                    status, content_type, body = await self.handle(method, path.split('?')[0], body)
+                    keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                await self.respond(writer, status, content_type, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(host='127.0.0.1', port=8080, max_batch_size=256, max_wait_ms=5.0, max_queue=4096,
+                neuro_fuzzy=None, mamdani_method=None, ready=None):
+    batcher = MicroBatcher(make_scorer(neuro_fuzzy, mamdani_method), max_batch_size, max_wait_ms, max_queue)
+    service = ScoringService(batcher)
+    batcher.start()
+    server = await asyncio.start_server(service.serve_connection, host, port, backlog=1024)
+    if ready is not None:
+        ready(server)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve CHD scores over HTTP/JSON, micro-batching concurrent requests.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch-size', type=int, default=256, help="patients per scoring call (default: 256)")
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help="longest wait for a batch to fill (default: 5)")
+    parser.add_argument('--max-queue', type=int, default=4096, help="queued requests before answering 503 (default: 4096)")
+    parser.add_argument('--mamdani-method', choices=['singleton', 'centroid', 'bisector', 'mom'])
+    parser.add_argument('--no-neuro-fuzzy', action='store_true', help="skip the neuro-fuzzy score")
+    parser.add_argument('--model', help="neuro-fuzzy model file: loaded if it exists, otherwise trained and saved there")
+    parser.add_argument('--train-samples', type=int, default=5000, help="synthetic samples to train the neuro-fuzzy model on (default: 5000)")
+    parser.add_argument('--train-epochs', type=int, default=20, help="neuro-fuzzy training epochs (default: 20)")
+    args = parser.parse_args(argv)
+    if args.max_batch_size <= 0 or args.max_queue <= 0 or args.max_wait_ms < 0:
+        parser.error("--max-batch-size and --max-queue must be positive, --max-wait-ms non-negative")
+    model = None
+    if not args.no_neuro_fuzzy and args.model and os.path.exists(args.model):
+        model = chd_core.load_model(args.model, mmap_mode='r')
+        print(f"Loaded neuro-fuzzy model from {args.model}", file=sys.stderr)
+    elif not args.no_neuro_fuzzy:
+        print(f"Training neuro-fuzzy model on {args.train_samples} samples...", file=sys.stderr)
+        model = train_neuro_fuzzy_model(args.train_samples, args.train_epochs)
+        if args.model:
+            chd_core.neuro_fuzzy_system()['save_model'](model, args.model)
+    ready = lambda server: print(f"Listening on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch_size, args.max_wait_ms, args.max_queue, model,
+                          args.mamdani_method, ready))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,60 @@
+from parallel_utils import shared_row_map
 
-def sensitivity_analysis(base_patient):
-    bp, chol, hr, age, smoking, diabetes = base_patient
-    variations = np.linspace(0.5, 1.5, 11)  # 50% to 150% in 10 steps
-    results = {'BP': [],'Chol': [],'HR': [],'Age': [],'Smoking': [],'Diabetes': []}
+SENSITIVITY_FACTORS = ['BP', 'Chol', 'HR', 'Age', 'Smoking', 'Diabetes']  # same column order as VARIABLES
+# Input ranges for the global analysis, matching the synthetic cohort
+SENSITIVITY_BOUNDS = np.array([[90, 210], [100, 300], [50, 150], [20, 90], [0, 2], [70, 300]], dtype=float)
 
-    for factor in results.keys():
-        print(f"\nAnalyzing {factor}...")
-        for var in variations:
-            if factor == 'BP':
-                new_val = bp * var
-                result_dict = diagnose_patient_advanced(new_val, chol, hr, age, smoking, diabetes)
-                sugeno = result_dict['sugeno']
-            elif factor == 'Chol':
-                new_val = chol * var
-                result_dict = diagnose_patient_advanced(bp, new_val, hr, age, smoking, diabetes)
-                sugeno = result_dict['sugeno']
-            elif factor == 'HR':
-                new_val = hr * var
-                result_dict = diagnose_patient_advanced(bp, chol, new_val, age, smoking, diabetes)
-                sugeno = result_dict['sugeno']
-            elif factor == 'Age':
-                new_val = age * var
-                result_dict = diagnose_patient_advanced(bp, chol, hr, new_val, smoking, diabetes)
-                sugeno = result_dict['sugeno']
-            elif factor == 'Smoking':
-                new_val = smoking * var
-                result_dict = diagnose_patient_advanced(bp, chol, hr, age, new_val, diabetes)
-                sugeno = result_dict['sugeno']
-            elif factor == 'Diabetes':
-                new_val = diabetes * var
-                result_dict = diagnose_patient_advanced(bp, chol, hr, age, smoking, new_val)
-                sugeno = result_dict['sugeno']
-            results[factor].append(sugeno)
+def score_rows(X, output='sugeno', n_workers=1):
+    # One batched diagnosis pass, optionally split into row ranges over forked workers sharing X and the output
+    return shared_row_map(lambda block: diagnose_patients_batch(block)[output], np.asarray(X, dtype=float), n_workers)
+
+def sensitivity_grid(base_patients, variations):
+    # (P, 6) base patients -> (P, n_factors, n_variations, 6): one factor scaled at a time
+    base = np.atleast_2d(np.asarray(base_patients, dtype=float))
+    grid = np.repeat(base[:, None, None, :], len(SENSITIVITY_FACTORS) * len(variations), axis=1)
+    grid = grid.reshape(base.shape[0], len(SENSITIVITY_FACTORS), len(variations), base.shape[1])
+    for col in range(len(SENSITIVITY_FACTORS)):
+        grid[:, col, :, col] *= variations
+    return grid
+
+def sensitivity_analysis(base_patient, variations=None):
+    if variations is None:
+        variations = np.linspace(0.5, 1.5, 11)  # 50% to 150% in 10 steps
+    grid = sensitivity_grid(base_patient, variations)
+    sugeno = score_rows(grid.reshape(-1, grid.shape[-1])).reshape(len(SENSITIVITY_FACTORS), len(variations))
+    results = {factor: sugeno[col].tolist() for col, factor in enumerate(SENSITIVITY_FACTORS)}
     return variations, results
 
-def plot_sensitivity_analysis(variations, results):
-    #sensitivity analysis results
+def sensitivity_analysis_cohort(base_patients, variations=None, output='sugeno', n_workers=1):
+    # One-at-a-time analysis around many patients: returns (variations, (P, n_factors, n_variations) outputs)
+    if variations is None:
+        variations = np.linspace(0.5, 1.5, 11)
+    grid = sensitivity_grid(base_patients, variations)
+    scores = score_rows(grid.reshape(-1, grid.shape[-1]), output, n_workers)
+    return variations, scores.reshape(grid.shape[:3])
+
+def sobol_indices(n_samples=4096, bounds=None, output='sugeno', n_workers=1, seed=0):
+    # Saltelli sampling with Saltelli (first-order) and Jansen (total) estimators over the input ranges
+    bounds = SENSITIVITY_BOUNDS if bounds is None else np.asarray(bounds, dtype=float)
+    rng = np.random.default_rng(seed)
+    d = len(bounds)
+    A = rng.uniform(bounds[:, 0], bounds[:, 1], size=(n_samples, d))
+    B = rng.uniform(bounds[:, 0], bounds[:, 1], size=(n_samples, d))
+    AB = np.repeat(A[None], d, axis=0)
+    for col in range(d):
+        AB[col, :, col] = B[:, col]
+    # A, B and all d mixed matrices are scored in one pass
+    Y = score_rows(np.concatenate([A, B, AB.reshape(-1, d)]), output, n_workers)
+    Y_A, Y_B, Y_AB = Y[:n_samples], Y[n_samples:2 * n_samples], Y[2 * n_samples:].reshape(d, n_samples)
+    variance = np.var(np.concatenate([Y_A, Y_B]))
+    if variance == 0:
+        raise ValueError("Output does not vary over these bounds")
+    first = np.mean(Y_B * (Y_AB - Y_A), axis=1) / variance
+    total = 0.5 * np.mean((Y_A - Y_AB) ** 2, axis=1) / variance
+    return {'S1': dict(zip(SENSITIVITY_FACTORS, first.tolist())), 'ST': dict(zip(SENSITIVITY_FACTORS, total.tolist()))}
+
+def plot_sensitivity_analysis(variations, results, show=False):
+    #sensitivity analysis results; show=True opens the window, otherwise the figure is only saved
     plt.figure(figsize=(12, 8))
     for factor, values in results.items():
         plt.plot(variations * 100, values, marker='o', linewidth=2, label=factor)
@@ -47,5 +66,8 @@ def plot_sensitivity_analysis(variations, results):
     plt.axhline(y=2.5, color='r', linestyle='--', alpha=0.5, label='Sick threshold (2.5)')
     plt.axhline(y=1.5, color='g', linestyle='--', alpha=0.5, label='Healthy threshold (1.5)')
     plt.savefig('sensitivity_analysis.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    if show:
+        plt.show()
+    else:
+        plt.close()
     print("Sensitivity plot saved as 'sensitivity_analysis.png'")
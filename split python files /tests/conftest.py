@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The notebook cells and helper modules live one folder up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from notebook_cells import load_advanced_system
+
+MAMDANI = ['singleton', 'centroid', 'bisector', 'mom']
+LOW, HIGH = [90, 100, 50, 20, 0, 70], [210, 300, 150, 90, 2, 300]
+
+@pytest.fixture
+def system():
+    # A fresh namespace per test, so LUT, rule index and method switches never leak between tests
+    return load_advanced_system()
+
+@pytest.fixture
+def patients(system):
+    # Random patients plus rows with one input on each vertex of its membership functions
+    rng = np.random.default_rng(0)
+    X = rng.uniform(LOW, HIGH, size=(400, 6))
+    rows = [X]
+    for col, var in enumerate(system['VARIABLES']):
+        vertices = sorted({v for _, params in system['MEMBERSHIP_PARAMS'][var].values() for v in params})
+        block = X[:len(vertices)].copy()
+        block[:, col] = vertices
+        rows.append(block)
+    return np.concatenate(rows)
+
+def scalar_outputs(system, X, method=None):
+    results = [system['diagnose_patient_advanced'](*row, use_cache=False, mamdani_method=method) for row in X.tolist()]
+    return np.array([r['mamdani'] for r in results]), np.array([r['sugeno'] for r in results])
+
+@pytest.mark.parametrize('method', MAMDANI)
+def test_batch_matches_scalar(system, patients, method):
+    batch = system['diagnose_patients_batch'](patients, method)
+    mamdani, sugeno = scalar_outputs(system, patients, method)
+    np.testing.assert_allclose(batch['mamdani'], mamdani, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(batch['sugeno'], sugeno, rtol=0, atol=1e-9)
+
+def test_default_mamdani_is_singleton(system, patients):
+    default = system['diagnose_patients_batch'](patients)['mamdani']
+    np.testing.assert_array_equal(default, system['diagnose_patients_batch'](patients, 'singleton')['mamdani'])
+
+@pytest.mark.parametrize('method', MAMDANI)
+def test_original_system_batch_matches_scalar(method):
+    import fuzzy_chd
+    X = np.random.default_rng(1).uniform([90, 100, 50], [210, 300, 150], size=(300, 3))
+    batch = fuzzy_chd.sweep_rule_weights(X, np.ones((1, len(fuzzy_chd.RULE_TABLE))), method)
+    scalar = np.array([fuzzy_chd.diagnose_patient(*row, mamdani_method=method)[:2] for row in X.tolist()])
+    np.testing.assert_allclose(batch['mamdani'][0], scalar[:, 0], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(batch['sugeno'][0], scalar[:, 1], rtol=0, atol=1e-9)
+
+@pytest.mark.parametrize('method', MAMDANI)
+def test_interpolated_lut_matches_exact(system, patients, method):
+    exact = system['diagnose_patients_batch'](patients, method)
+    system['enable_membership_lut'](resolution=512, interpolate=True)
+    lut = system['diagnose_patients_batch'](patients, method)
+    np.testing.assert_allclose(lut['mamdani'], exact['mamdani'], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(lut['sugeno'], exact['sugeno'], rtol=0, atol=1e-9)
+
+@pytest.mark.parametrize('interpolate', [True, False])
+def test_lut_keeps_zero_and_one_exact(system, patients, interpolate):
+    exact = {var: system['fuzzify_variable_batch'](var, patients[:, col]) for col, var in enumerate(system['VARIABLES'])}
+    system['enable_membership_lut'](resolution=512, interpolate=interpolate)
+    for col, var in enumerate(system['VARIABLES']):
+        lut = system['fuzzify_variable_batch'](var, patients[:, col])
+        np.testing.assert_array_equal(lut == 0, exact[var] == 0)
+        np.testing.assert_array_equal(lut == 1, exact[var] == 1)
+
+@pytest.mark.parametrize('interpolate', [True, False])
+def test_lut_error_within_bound(system, interpolate):
+    system['enable_membership_lut'](resolution=512, interpolate=interpolate)
+    report = system['membership_lut_error'](samples=20001, patients=2000)
+    for var in system['VARIABLES']:
+        assert report[var]['max_error'] <= report[var]['bound'] + 1e-12
+
+def test_lut_scalar_path_stays_exact(system, patients):
+    before = scalar_outputs(system, patients)
+    system['enable_membership_lut'](resolution=64, interpolate=False)
+    after = scalar_outputs(system, patients)
+    np.testing.assert_array_equal(before[0], after[0])
+    np.testing.assert_array_equal(before[1], after[1])
+
+@pytest.mark.parametrize('lut', [False, True])
+def test_rule_index_matches_dense(system, patients, lut):
+    if lut:
+        system['enable_membership_lut'](resolution=512)
+    system['enable_rule_index']()
+    system['MEMBERSHIP_PARAMS']['bp']['High'] = ('triangular', (130, 170, 220))
+    indexed = system['diagnose_patients_batch'](patients)
+    indexed_scalar = scalar_outputs(system, patients)
+    system['disable_rule_index']()
+    dense = system['diagnose_patients_batch'](patients)
+    np.testing.assert_array_equal(indexed['sugeno'], dense['sugeno'])
+    np.testing.assert_array_equal(indexed_scalar[1], scalar_outputs(system, patients)[1])